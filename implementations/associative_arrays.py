@@ -51,6 +51,10 @@ If the load factor is approx 0 the array is nearly empty (a lot of memory is was
 
 In python when 66% of the array is full we have to resize the underlying array structure. Resizing takes O(N)
 We can NOT just copy items across as we have to rehash them because hashing is reliant on the hashtable size
+    - incremental rehashing: we keep the old table and move a few slots on every operation
+        so no single insertion has to pay the O(N) cost of the resize
+    - removing from open addressing: we leave a tombstone in the slot, otherwise the linear probing would stop
+        at the empty slot and the items shifted past it would be lost
 
 Application:
     - databases
@@ -60,88 +64,806 @@ Application:
 
 """
 
+import threading
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Hash functions: they return an integer and the hashtable uses the modulo operator to get the index of the slot
+
+# we can take the ASCII value for each character and sum them up
+# simple BUT every anagram gets the same index ("apple" and "paple" collide) and it only works for strings
+def sum_of_characters_hash(key):
+    sum_of_characters = 0
+    for pos in range(len(key)):
+        sum_of_characters = sum_of_characters + ord(key[pos])
+
+    return sum_of_characters
+
+
+# python's built-in hash() is implemented in C (SipHash for strings) and works for every hashable key
+def builtin_hash(key):
+    return hash(key)
+
+
+FNV_OFFSET_BASIS = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = 0xffffffffffffffff
+
+
+# FNV-1a (64 bit): for every byte we XOR it into the hash and multiply by the FNV prime
+# the order of the characters matters so anagrams do not collide
+def fnv1a_hash(key):
+    if isinstance(key, str):
+        data = key.encode('utf-8')
+    elif isinstance(key, int):
+        data = key.to_bytes(key.bit_length() // 8 + 1, 'little', signed=True)
+    else:
+        data = bytes(key)
+
+    hash_value = FNV_OFFSET_BASIS
+    for byte in data:
+        hash_value = hash_value ^ byte
+        hash_value = (hash_value * FNV_PRIME) & MASK_64
+
+    return hash_value
+
+
+# 2^64 divided by the golden ratio
+GOLDEN_RATIO_64 = 0x9e3779b97f4a7c15
+
+
+# multiplicative hashing (Knuth) for integer keys: we multiply by a large odd constant and keep the upper bits
+# consecutive integers are spread all over the table instead of filling consecutive slots
+def multiplicative_hash(key):
+    return ((key * GOLDEN_RATIO_64) & MASK_64) >> 32
+
+
+# marks a removed item: linear probing stops at empty slots so we can not just set the slot back to None
+# (the items that were shifted past the removed one due to a collision would not be found anymore)
+TOMBSTONE = object()
+
 
 class HashTable:
 
-    def __init__(self):
-        self.size = 10
-        self.keys = [None] * self.size
-        self.values = [None] * self.size
+    def __init__(self, size=10, max_load_factor=0.66, rehash_batch=8, hash_strategy=builtin_hash):
+        self.initial_size = size
+        # any function that returns an integer for the key (see the hash functions above)
+        self.hash_strategy = hash_strategy
+        # we resize when the load factor (n/m) would exceed this value (66% like in python)
+        self.max_load_factor = max_load_factor
+        # and we shrink the table when it gets too empty (wasted memory)
+        self.min_load_factor = max_load_factor / 4
+        # number of slots we move from the old table to the new one on every operation
+        self.rehash_batch = rehash_batch
+
+        self.size = size
+        self.key_slots = [None] * self.size
+        self.value_slots = [None] * self.size
+        self.count = 0  # number of items
+        self.used = 0  # items + tombstones, both of them are part of the probe sequences
+
+        # while we are resizing the items are moved incrementally from the old table to the new one
+        # so no single put() has to pay the O(N) cost of rehashing every item
+        self.old_key_slots = None
+        self.old_value_slots = None
+        self.old_size = 0
+        self.old_count = 0
+        self.rehash_index = 0
+
+    def load_factor(self):
+        return (self.count + self.old_count) / self.size
+
+    def __len__(self):
+        return self.count + self.old_count
+
+    def __contains__(self, key):
+
+        self.rehash_step()
+
+        if self.find_index(self.key_slots, self.size, key) is not None:
+            return True
+
+        return self.old_key_slots is not None and self.find_index(self.old_key_slots, self.old_size, key) is not None
 
     def put(self, key, data):
 
-        index = self.hash_function(key)
+        self.rehash_step()
+
+        # the key may not have been moved to the new table yet
+        if self.old_key_slots is not None:
+            index = self.find_index(self.old_key_slots, self.old_size, key)
+            if index is not None:  # we want to update
+                self.old_value_slots[index] = data
+                return
+
+        # update the item if it is already in the table
+        index = self.find_index(self.key_slots, self.size, key)
+        if index is not None:
+            self.value_slots[index] = data
+            return
+
+        # we resize BEFORE the insertion so there is always an empty slot to stop the linear probing
+        # tombstones count as well because they make the probe sequences longer
+        # and so do the items of the old table which are going to be moved here
+        if self.used + self.old_count + 1 > self.max_load_factor * self.size:
+            if self.count + self.old_count + 1 > self.max_load_factor * self.size / 2:
+                self.start_resize(self.size * 2)
+            else:
+                # mostly tombstones: rebuilding the table with the same size gets rid of them
+                self.start_resize(self.size)
+
+        self.insert_into_table(key, data)
+
+    def insert_into_table(self, key, data, index=None):
+
+        if index is None:
+            index = self.hash_function(key, self.size)
+        tombstone_index = None
 
         # not None -> it is a collision !!
-        while self.keys[index] is not None:
-            if self.keys[index] == key: # we want to update
-                self.values[index] = data
+        while self.key_slots[index] is not None:
+            if self.key_slots[index] is TOMBSTONE:
+                # we can reuse the first removed slot BUT the key may be further in the probe sequence
+                if tombstone_index is None:
+                    tombstone_index = index
+            elif self.key_slots[index] == key:  # we want to update
+                self.value_slots[index] = data
                 return
 
             # open addressing to try find another slot with linear probing
-            index = (index+1)%self.size
+            index = (index+1) % self.size
 
         # insert
-        self.keys[index] = key
-        self.values[index] = data
+        if tombstone_index is not None:
+            index = tombstone_index
+        else:
+            self.used = self.used + 1
+
+        self.key_slots[index] = key
+        self.value_slots[index] = data
+        self.count = self.count + 1
 
     def get(self, key):
 
-        index = self.hash_function(key)
+        self.rehash_step()
 
-        while self.keys[index] is not None:
-            if self.keys[index] == key: # we want to update
-                return self.values[index]
+        index = self.find_index(self.key_slots, self.size, key)
+        if index is not None:
+            return self.value_slots[index]
 
-            index = (index+1)%self.size  # perhaps we shifted the index due to a collision
+        if self.old_key_slots is not None:
+            index = self.find_index(self.old_key_slots, self.old_size, key)
+            if index is not None:
+                return self.old_value_slots[index]
 
         return None  # key is not present in the associative array
 
+    def remove(self, key):
+        """
+        Replaces the item with a tombstone and returns the removed value (None if the key is not present)
+        O(1) on average
+        """
+        self.rehash_step()
+
+        data = None
+        index = self.find_index(self.key_slots, self.size, key)
+
+        if index is not None:
+            data = self.value_slots[index]
+            self.key_slots[index] = TOMBSTONE
+            self.value_slots[index] = None
+            self.count = self.count - 1
+        elif self.old_key_slots is not None:
+            index = self.find_index(self.old_key_slots, self.old_size, key)
+            if index is not None:
+                data = self.old_value_slots[index]
+                self.old_key_slots[index] = TOMBSTONE
+                self.old_value_slots[index] = None
+                self.old_count = self.old_count - 1
+
+        if self.size > self.initial_size and self.count + self.old_count < self.min_load_factor * self.size:
+            self.start_resize(max(self.size // 2, self.initial_size))
+
+        return data
+
+    def reserve(self, count):
+        """
+        Makes sure the table can store count items without resizing
+        We resize at most once (and not incrementally) so a bulk load does not rehash the items again and again
+        """
+        self.finish_rehash()
+
+        # tombstones take up slots as well
+        if self.used + count - self.count <= self.max_load_factor * self.size:
+            return
+
+        new_size = self.size
+        while count > self.max_load_factor * new_size:
+            new_size = new_size * 2
+
+        self.start_resize(new_size)
+        self.finish_rehash()
+
+    def hash_indexes(self, keys, size=None):
+        """
+        Hashes all the keys in a single pass
+        Integer keys with multiplicative_hash are hashed with numpy (vectorised) if it is installed
+        """
+        if size is None:
+            size = self.size
+
+        if numpy is not None and self.hash_strategy is multiplicative_hash and keys:
+            key_array = numpy.asarray(keys)
+            if key_array.dtype.kind in 'iu':
+                # uint64 multiplication overflows (wraps around) just like the & MASK_64 in multiplicative_hash
+                hashes = (key_array.astype(numpy.uint64) * numpy.uint64(GOLDEN_RATIO_64)) >> numpy.uint64(32)
+                return (hashes % numpy.uint64(size)).tolist()
+
+        hash_strategy = self.hash_strategy
+        return [hash_strategy(key) % size for key in keys]
+
+    def put_many(self, pairs):
+        """
+        Inserts (key, value) pairs: the table is resized once up front and the keys are hashed in a single pass
+        """
+        pairs = list(pairs)
+        self.reserve(len(self) + len(pairs))
+
+        indexes = self.hash_indexes([key for key, _ in pairs])
+
+        for (key, data), index in zip(pairs, indexes):
+            self.insert_into_table(key, data, index)
+
+    def get_many(self, keys):
+        """
+        Returns the values of the keys (None if the key is not present) in the same order
+        """
+        keys = list(keys)
+        # move the rest of the old table now so we only have to look up the keys in a single table
+        self.finish_rehash()
+
+        key_slots = self.key_slots
+        value_slots = self.value_slots
+        size = self.size
+        values = []
+
+        for key, index in zip(keys, self.hash_indexes(keys)):
+            index = self.find_index(key_slots, size, key, index)
+            values.append(value_slots[index] if index is not None else None)
+
+        return values
+
+    def items(self):
+        for key_slots, value_slots in ((self.key_slots, self.value_slots),
+                                       (self.old_key_slots, self.old_value_slots)):
+            if key_slots is None:
+                continue
+            for key, data in zip(key_slots, value_slots):
+                if key is not None and key is not TOMBSTONE:
+                    yield key, data
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, data in self.items():
+            yield data
+
+    def find_index(self, keys, size, key, index=None):
+        if index is None:
+            index = self.hash_function(key, size)
+
+        while keys[index] is not None:
+            if keys[index] is not TOMBSTONE and keys[index] == key:
+                return index
+
+            index = (index+1) % size  # perhaps we shifted the index due to a collision
+
+        return None
+
+    def start_resize(self, new_size):
+        """
+        The current table becomes the old table and we allocate an empty one
+        We can NOT just copy the items as the index depends on the size of the table, we rehash them
+        in rehash_step()
+        """
+        if self.old_key_slots is not None:
+            self.finish_rehash()
+
+        self.old_key_slots = self.key_slots
+        self.old_value_slots = self.value_slots
+        self.old_size = self.size
+        self.old_count = self.count
+        self.rehash_index = 0
+
+        self.size = new_size
+        self.key_slots = [None] * self.size
+        self.value_slots = [None] * self.size
+        self.count = 0
+        self.used = 0
+
+    def rehash_step(self):
+        """
+        Moves the next rehash_batch slots of the old table to the new table: O(1) per operation
+        The moved slots become tombstones so the probe sequences of the old table remain valid
+        """
+        if self.old_key_slots is None:
+            return
+
+        end = min(self.rehash_index + self.rehash_batch, self.old_size)
+
+        for index in range(self.rehash_index, end):
+            key = self.old_key_slots[index]
+            if key is not None and key is not TOMBSTONE:
+                self.insert_into_table(key, self.old_value_slots[index])
+                self.old_key_slots[index] = TOMBSTONE
+                self.old_value_slots[index] = None
+                self.old_count = self.old_count - 1
+
+        self.rehash_index = end
+
+        if self.rehash_index == self.old_size:
+            self.old_key_slots = None
+            self.old_value_slots = None
+            self.old_size = 0
+            self.old_count = 0
+
+    def finish_rehash(self):
+        while self.old_key_slots is not None:
+            self.rehash_step()
+
     # returns an integer (index of the array slot)
-    # we can take the ASCII value for each character
-    # sum them up and use modulo operator (to normalize it)
-    def hash_function(self, key):
-        sum_of_characters = 0
-        for pos in range(len(key)):
-            sum_of_characters = sum_of_characters + ord(key[pos])
+    # we use modulo operator on the hash value (to normalize it)
+    def hash_function(self, key, size=None):
+        if size is None:
+            size = self.size
+
+        return self.hash_strategy(key) % size
+
+    def probe_histogram(self):
+        """
+        Number of slots we have to check to find each key: {probe length: number of keys}
+        A key stored in its own slot has probe length 1, long probe lengths mean clusters
+        O(N) as we check every slot of the table
+        """
+        histogram = {}
+
+        for keys, size in ((self.key_slots, self.size), (self.old_key_slots, self.old_size)):
+            if keys is None:
+                continue
+            for index, key in enumerate(keys):
+                if key is None or key is TOMBSTONE:
+                    continue
+                probe_length = (index - self.hash_function(key, size)) % size + 1
+                histogram[probe_length] = histogram.get(probe_length, 0) + 1
+
+        return dict(sorted(histogram.items()))
+
+
+# marks an empty slot in the array of probe distances of the Robin Hood hashtable
+EMPTY = -1
+
+
+class RobinHoodHashTable:
+    """
+    Open addressing with linear probing BUT on insertion we compare how far the new item is from its own slot
+    (probe distance) with the item in the slot: if the item in the slot is closer to its own slot ("richer")
+    the new item takes the slot and we continue with the displaced item ("take from the rich, give to the poor")
+        - the probe distances of the items are much more even so clusters do not grow as much
+        - search can stop as soon as the item in the slot is closer to home than we are
+        - deletion with backward shift: we move the next items back by one slot until we find an empty slot
+            or an item in its own slot, so no tombstones are needed
+    The keys and values can be stored in typed arrays (array module) instead of lists of python objects
+    For example key_type='q' (64 bit integers) and value_type='d' (floats) uses 8 + 8 + 4 bytes per slot
+    while a dict needs a pointer to a separate int and float object for every item
+    """
+
+    def __init__(self, size=16, max_load_factor=0.9, key_type=None, value_type=None, hash_strategy=builtin_hash):
+        self.initial_size = size
+        # Robin Hood hashing keeps the probe sequences short even when the table is 90% full
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = max_load_factor / 4
+        # typecodes of the array module ('q', 'd' etc.) or None for python objects
+        self.key_type = key_type
+        self.value_type = value_type
+        self.hash_strategy = hash_strategy
+
+        self.size = size
+        self.key_slots = self.new_storage(self.key_type, self.size)
+        self.value_slots = self.new_storage(self.value_type, self.size)
+        # how far each item is from the slot given by the hash function (EMPTY if there is no item)
+        self.distances = array('i', [EMPTY]) * self.size
+        self.count = 0
+
+    @staticmethod
+    def new_storage(typecode, size):
+        if typecode is None:
+            return [None] * size
+        return array(typecode, [0]) * size
+
+    def hash_function(self, key, size=None):
+        if size is None:
+            size = self.size
+
+        return self.hash_strategy(key) % size
+
+    # O(1) on average
+    def put(self, key, data):
+
+        if self.count + 1 > self.max_load_factor * self.size:
+            self.resize(self.size * 2)
+
+        keys = self.key_slots
+        values = self.value_slots
+        distances = self.distances
+        index = self.hash_function(key)
+        distance = 0
+
+        while True:
+            if distances[index] == EMPTY:
+                keys[index] = key
+                values[index] = data
+                distances[index] = distance
+                self.count = self.count + 1
+                return
+
+            if keys[index] == key:  # we want to update
+                values[index] = data
+                return
+
+            if distances[index] < distance:
+                # the item in the slot is richer (closer to its own slot): we take the slot
+                # and continue with the item we displaced (it can not be in the rest of the table)
+                keys[index], key = key, keys[index]
+                values[index], data = data, values[index]
+                distances[index], distance = distance, distances[index]
+
+            index = (index + 1) % self.size
+            distance = distance + 1
+
+    def find_index(self, key):
+        keys = self.key_slots
+        distances = self.distances
+        index = self.hash_function(key)
+        distance = 0
+
+        # if the item in the slot is closer to its own slot than we are, the key can not be in the table
+        while distances[index] != EMPTY and distance <= distances[index]:
+            if keys[index] == key:
+                return index
+            index = (index + 1) % self.size
+            distance = distance + 1
+
+        return None
+
+    # O(1) on average
+    def get(self, key):
+        index = self.find_index(key)
+        if index is None:
+            return None  # key is not present in the associative array
+        return self.value_slots[index]
+
+    # O(1) on average - returns the removed value
+    def remove(self, key):
+        index = self.find_index(key)
+        if index is None:
+            return None
+
+        keys = self.key_slots
+        values = self.value_slots
+        distances = self.distances
+        data = values[index]
+
+        # backward shift: the following items move one slot closer to their own slot
+        next_index = (index + 1) % self.size
+        while distances[next_index] != EMPTY and distances[next_index] > 0:
+            keys[index] = keys[next_index]
+            values[index] = values[next_index]
+            distances[index] = distances[next_index] - 1
+            index = next_index
+            next_index = (next_index + 1) % self.size
+
+        distances[index] = EMPTY
+        if self.key_type is None:
+            keys[index] = None  # do not keep a reference to removed objects
+        if self.value_type is None:
+            values[index] = None
+        self.count = self.count - 1
+
+        if self.size > self.initial_size and self.count < self.min_load_factor * self.size:
+            self.resize(max(self.size // 2, self.initial_size))
+
+        return data
+
+    # O(N) we have to rehash every item because the index depends on the size of the table
+    def resize(self, new_size):
+        old_keys = self.key_slots
+        old_values = self.value_slots
+        old_distances = self.distances
+
+        self.size = new_size
+        self.key_slots = self.new_storage(self.key_type, self.size)
+        self.value_slots = self.new_storage(self.value_type, self.size)
+        self.distances = array('i', [EMPTY]) * self.size
+        self.count = 0
+
+        for index in range(len(old_distances)):
+            if old_distances[index] != EMPTY:
+                self.put(old_keys[index], old_values[index])
+
+    def probe_histogram(self):
+        """
+        Number of slots we have to check to find each key: {probe length: number of keys}
+        """
+        histogram = {}
+
+        for distance in self.distances:
+            if distance != EMPTY:
+                histogram[distance + 1] = histogram.get(distance + 1, 0) + 1
+
+        return dict(sorted(histogram.items()))
+
+
+def benchmark_against_dict(size=10**6, lookups=10**5):
+    """
+    Memory (measured with tracemalloc so the int and float objects of the dict are included)
+    and lookup time of RobinHoodHashTable with typed arrays versus the built-in dict
+    for integer keys and float values
+    """
+    import random
+    import time
+    import tracemalloc
+
+    keys = random.sample(range(size * 10), size)
+    queries = [random.choice(keys) for _ in range(lookups)]
+
+    tracemalloc.start()
+
+    start_memory = tracemalloc.get_traced_memory()[0]
+    table = RobinHoodHashTable(key_type='q', value_type='d', hash_strategy=multiplicative_hash)
+    for key in keys:
+        table.put(key, key * 0.5)
+    table_memory = tracemalloc.get_traced_memory()[0] - start_memory
+
+    start_memory = tracemalloc.get_traced_memory()[0]
+    dictionary = {}
+    for key in keys:
+        dictionary[key] = key * 0.5
+    dict_memory = tracemalloc.get_traced_memory()[0] - start_memory
+
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for key in queries:
+        table.get(key)
+    table_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in queries:
+        dictionary.get(key)
+    dict_time = time.perf_counter() - start
+
+    print(f'{size} items, {lookups} lookups')
+    print(f'RobinHoodHashTable: {table_memory / size:.1f} bytes per item, '
+          f'{table_time / lookups * 10**9:.0f} ns per lookup')
+    print(f'dict:               {dict_memory / size:.1f} bytes per item, '
+          f'{dict_time / lookups * 10**9:.0f} ns per lookup')
+
+
+class ConcurrentHashTable:
+    """
+    Thread safe hashtable with lock striping: the keys are split between shard_count HashTables
+    and every shard has its own lock, so threads working on different shards do not wait for each other
+    (a single global lock would serialise every operation)
+    Every operation on a single key is atomic, including put_if_absent() and compute()
+    ** the function given to compute() runs while the lock of the shard is held so it must not use the table **
+    """
+
+    def __init__(self, shard_count=16, hash_strategy=builtin_hash, **table_options):
+        self.shard_count = shard_count
+        self.hash_strategy = hash_strategy
+        self.shards = [HashTable(hash_strategy=hash_strategy, **table_options) for _ in range(shard_count)]
+        self.locks = [threading.Lock() for _ in range(shard_count)]
+
+    def shard_index(self, key):
+        # the shards use hash % size as well, so we mix the bits first otherwise
+        # every key of a shard would end up in the same few slots of the shard
+        return multiplicative_hash(self.hash_strategy(key)) % self.shard_count
+
+    def put(self, key, data):
+        index = self.shard_index(key)
+        with self.locks[index]:
+            self.shards[index].put(key, data)
+
+    def get(self, key):
+        index = self.shard_index(key)
+        # get() needs the lock as well: it moves items while the shard is rehashing
+        with self.locks[index]:
+            return self.shards[index].get(key)
+
+    def remove(self, key):
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].remove(key)
+
+    def __contains__(self, key):
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return key in self.shards[index]
+
+    def __len__(self):
+        count = 0
+        for lock, shard in zip(self.locks, self.shards):
+            with lock:
+                count = count + len(shard)
+        return count
+
+    def put_if_absent(self, key, data):
+        """
+        Inserts the item only if the key is not present
+        Returns the current value if the key is present (and None if we inserted the item)
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            shard = self.shards[index]
+            if key in shard:
+                return shard.get(key)
+            shard.put(key, data)
+            return None
+
+    def compute(self, key, function):
+        """
+        Atomic read-modify-write: the new value is function(current value or None)
+        If the function returns None the item is removed
+        Returns the new value
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            shard = self.shards[index]
+            data = function(shard.get(key))
+            if data is None:
+                shard.remove(key)
+            else:
+                shard.put(key, data)
+            return data
+
+
+class GlobalLockHashTable:
+    """
+    HashTable wrapped in a single lock, only used as the baseline of benchmark_contention()
+    """
+
+    def __init__(self, **table_options):
+        self.table = HashTable(**table_options)
+        self.lock = threading.Lock()
+
+    def put(self, key, data):
+        with self.lock:
+            self.table.put(key, data)
+
+    def get(self, key):
+        with self.lock:
+            return self.table.get(key)
+
+    def compute(self, key, function):
+        with self.lock:
+            data = function(self.table.get(key))
+            self.table.put(key, data)
+            return data
+
+
+def benchmark_contention(thread_counts=(1, 2, 4, 8, 16, 32), operations=10**5, key_count=10**4):
+    """
+    Every thread runs operations/threads operations (50% get, 30% put, 20% compute) on the same table
+    and we print the throughput of ConcurrentHashTable and of a HashTable behind a single global lock
+    Note: in CPython the GIL only lets one thread run python code at a time, lock striping removes
+    the waiting for the lock but the speedup depends on the interpreter (free threaded builds scale further)
+    """
+    import random
+    import time
+
+    def increment(value):
+        return 1 if value is None else value + 1
+
+    def worker(table, keys, operation_types):
+        for key, operation_type in zip(keys, operation_types):
+            if operation_type < 0.5:
+                table.get(key)
+            elif operation_type < 0.8:
+                table.put(key, key)
+            else:
+                table.compute(key, increment)
+
+    for thread_count in thread_counts:
+        per_thread = operations // thread_count
+        workloads = [([random.randrange(key_count) for _ in range(per_thread)],
+                      [random.random() for _ in range(per_thread)]) for _ in range(thread_count)]
+
+        for name, table in (('ConcurrentHashTable', ConcurrentHashTable()),
+                            ('global lock', GlobalLockHashTable())):
+            threads = [threading.Thread(target=worker, args=(table, keys, operation_types))
+                       for keys, operation_types in workloads]
+
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            print(f'{thread_count:>2} threads | {name:<19} | {per_thread * thread_count / elapsed:>10.0f} ops/s')
+
+
+if __name__ == '__main__':
+    table = HashTable()
+    table.put("apple", 20)
+    table.put("orange", 10)
+    table.put("lemons", 15)
+    table.put("peanuts", 30)
+
+    print(table.get("lemons"))
+
+    table.put_many([("banana", 5), ("cherry", 40)])
+    print(table.get_many(["banana", "apple", "kiwi"]), len(table), "cherry" in table)
+    print(list(table.items()))
+
+    table.remove("lemons")
+    print(table.get("lemons"))
 
-        return sum_of_characters % self.size
+    # anagrams all end up in the same cluster with the sum of characters
+    for hash_strategy in (sum_of_characters_hash, fnv1a_hash):
+        anagrams = HashTable(size=64, hash_strategy=hash_strategy)
+        for word in ('apple', 'paple', 'lappe', 'pplea', 'elppa', 'aplep'):
+            anagrams.put(word, len(word))
+        print(f'{hash_strategy.__name__}: {anagrams.probe_histogram()}')
 
+    robin_hood_table = RobinHoodHashTable(key_type='q', value_type='d')
+    for number in range(100):
+        robin_hood_table.put(number * 7, number / 2)
+    robin_hood_table.remove(14)
+    print(robin_hood_table.get(21), robin_hood_table.get(14), robin_hood_table.probe_histogram())
 
-table = HashTable()
-table.put("apple", 20)
-table.put("orange", 10)
-table.put("lemons", 15)
-table.put("peanuts", 30)
+    # benchmark_against_dict()
 
-print(table.get("lemons"))
+    concurrent_table = ConcurrentHashTable(shard_count=4)
+    concurrent_table.put_if_absent("apple", 1)
+    concurrent_table.put_if_absent("apple", 2)
+    concurrent_table.compute("apple", lambda value: value + 10)
+    print(concurrent_table.get("apple"), len(concurrent_table))
 
+    # benchmark_contention()
 
-# Creating dictionaries in python
 
-dictionary = {'Joe': 14, 'Jill': 39, 'Vanessa': 21}
+    # Creating dictionaries in python
 
-print(dictionary['Joe'])  # O(1) if hash function is efficient
+    dictionary = {'Joe': 14, 'Jill': 39, 'Vanessa': 21}
 
-# update
-dictionary['Joe'] = 15
+    print(dictionary['Joe'])  # O(1) if hash function is efficient
 
-print(dictionary['Joe'])  # Hashtable / dictionary: O(1)  arrays: O(N) BST: O(logN)
+    # update
+    dictionary['Joe'] = 15
 
-# remove all entries
-# dictionary.clear()
+    print(dictionary['Joe'])  # Hashtable / dictionary: O(1)  arrays: O(N) BST: O(logN)
 
-# delete dictionary
-# del dictionary
+    # remove all entries
+    # dictionary.clear()
 
-# get all key value pairs
-print(dictionary.items())
+    # delete dictionary
+    # del dictionary
 
-# get all the keys
-print(dictionary.keys())
+    # get all key value pairs
+    print(dictionary.items())
 
-# get all the values
-print(dictionary.values())
+    # get all the keys
+    print(dictionary.keys())
 
-# ** order between dict.values() and dict.keys() may be different!!! No order is maintained
+    # get all the values
+    print(dictionary.values())
 
+    # ** order between dict.values() and dict.keys() may be different!!! No order is maintained
@@ -87,7 +87,13 @@ Applications:
 """
 
 
+from node_arena import NodeArena, NIL
+from tree_snapshots import save_sorted, open_mmap
+
+
 class Node:
+    # no __dict__ for the nodes: the attributes are stored in fixed slots (less memory per node)
+    __slots__ = ('data', 'leftChild', 'rightChild', 'parent', 'height', 'size')
 
     def __init__(self, data, parent):
         self.data = data
@@ -95,12 +101,38 @@ class Node:
         self.rightChild = None
         self.parent = parent
         self.height = 0
+        # number of nodes in the subtree (including this node) so we can answer rank and select queries
+        self.size = 1
 
 
 class AVLTree:
 
-    def __init__(self):
+    def __init__(self, verbose=True):
         self.root = None
+        # number of rotations since the tree was created (benchmarks)
+        self.rotations = 0
+        # print the rotations and recoloring (off for benchmarks and big trees)
+        self.verbose = verbose
+
+    def search(self, data):
+        """
+        Returns the node with the given data (None if it is not in the tree)
+        O(logN) as the tree is balanced
+        """
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                node = node.leftChild
+            elif node.data < data:
+                node = node.rightChild
+            else:
+                return node
+
+        return None
+
+    def __contains__(self, data):
+        return self.search(data) is not None
 
     def remove(self, data):
         if self.root:
@@ -119,7 +151,8 @@ class AVLTree:
             # We found the node we want to remove
             # We want to delete a leaf node
             if node.leftChild is None and node.rightChild is None:
-                print(f'Removing a leaf node...{node.data}')
+                if self.verbose:
+                    print(f'Removing a leaf node...{node.data}')
 
                 parent = node.parent
 
@@ -137,9 +170,13 @@ class AVLTree:
 
                 del node
 
+                # removing the node may have made the parent (and the nodes above) unbalanced
+                self.handle_violation(parent)
+
             # we want to remove a node with one child
             elif node.leftChild is None and node.rightChild is not None:
-                print(f'Removing a node with single right child...{node.data}')
+                if self.verbose:
+                    print(f'Removing a node with single right child...{node.data}')
 
                 parent = node.parent
 
@@ -155,9 +192,13 @@ class AVLTree:
                 node.rightChild.parent = parent
                 del node
 
+                # removing the node may have made the parent (and the nodes above) unbalanced
+                self.handle_violation(parent)
+
             # we want to remove a node with one left child
             elif node.rightChild is None and node.leftChild is not None:
-                print(f'Removing a node with single left child...{node.data}')
+                if self.verbose:
+                    print(f'Removing a node with single left child...{node.data}')
 
                 parent = node.parent
 
@@ -173,9 +214,13 @@ class AVLTree:
                 node.leftChild.parent = parent
                 del node
 
+                # removing the node may have made the parent (and the nodes above) unbalanced
+                self.handle_violation(parent)
+
             # we want to remove a node with two children
             else:
-                print(f'Removing a node with two children nodes...{node.data}')
+                if self.verbose:
+                    print(f'Removing a node with two children nodes...{node.data}')
 
                 predecessor = self.get_predecessor(node.leftChild)
 
@@ -205,6 +250,7 @@ class AVLTree:
             else:
                 node.leftChild = Node(data, node)
                 node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
+                node.size = self.calculate_size(node.leftChild) + self.calculate_size(node.rightChild) + 1
         else:
             # we go to the right subtree
             if node.rightChild:
@@ -212,6 +258,7 @@ class AVLTree:
             else:
                 node.rightChild = Node(data, node)
                 node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
+                node.size = self.calculate_size(node.leftChild) + self.calculate_size(node.rightChild) + 1
 
         self.handle_violation(node)  # check if the tree has become unbalanced
 
@@ -221,11 +268,17 @@ class AVLTree:
             return -1
         return node.height
 
+    @staticmethod
+    def calculate_size(node):
+        if node is None:
+            return 0
+        return node.size
+
     def handle_violation(self, node):
         """
         Check if we have to make rotations to balance the tree.
         We check the parents of the node until we reach the root node
-        Update the height parameter (recalculate)
+        Update the height and size parameters (recalculate)
         We then check the balance factor, if it is more than 1 then the tree is unbalanced.
         We then need to make the necessary rotations to balance the tree.
         :param node:
@@ -233,6 +286,7 @@ class AVLTree:
         """
         while node is not None:
             node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
+            node.size = self.calculate_size(node.leftChild) + self.calculate_size(node.rightChild) + 1
             self.violation_helper(node)
             node = node.parent
 
@@ -252,7 +306,7 @@ class AVLTree:
         if balance_factor < -1:
             # the height of the right subtree height > left subtree height (right heavy)
 
-            if self.calculate_balance(node.leftChild) > 0:
+            if self.calculate_balance(node.rightChild) > 0:
                 # tree is right left unbalanced : we need right rotation on parent + below left rotation on grandparent
                 self.rotate_right(node.rightChild)
 
@@ -269,7 +323,9 @@ class AVLTree:
         """
         O(1) constant running time complexity
         """
-        print(f'Rotating to the right on node {node.data}')
+        if self.verbose:
+            print(f'Rotating to the right on node {node.data}')
+        self.rotations = self.rotations + 1
 
         # using temporary values we create a temporary left node that takes updated references for it's child nodes
         temp_left_node = node.leftChild
@@ -296,16 +352,20 @@ class AVLTree:
         if node == self.root:
             self.root = temp_left_node
 
-        # finally we have to update the height value
+        # finally we have to update the height and size values (the node is now the child so it goes first)
         node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
         temp_left_node.height = max(self.calculate_height(temp_left_node.leftChild),
                                     self.calculate_height(temp_left_node.rightChild)) + 1
+        node.size = self.calculate_size(node.leftChild) + self.calculate_size(node.rightChild) + 1
+        temp_left_node.size = self.calculate_size(temp_left_node.leftChild) + self.calculate_size(temp_left_node.rightChild) + 1
 
     def rotate_left(self, node):
         """
         O(1) constant running time complexity
         """
-        print(f'Rotating to the left on node {node.data}')
+        if self.verbose:
+            print(f'Rotating to the left on node {node.data}')
+        self.rotations = self.rotations + 1
 
         # using temporary values we create a temporary right node that takes updated references for it's child nodes
         temp_right_node = node.rightChild
@@ -332,10 +392,272 @@ class AVLTree:
         if node == self.root:
             self.root = temp_right_node
 
-        # finally we have to update the height value
+        # finally we have to update the height and size values (the node is now the child so it goes first)
         node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
         temp_right_node.height = max(self.calculate_height(temp_right_node.leftChild),
                                      self.calculate_height(temp_right_node.rightChild)) + 1
+        node.size = self.calculate_size(node.leftChild) + self.calculate_size(node.rightChild) + 1
+        temp_right_node.size = self.calculate_size(temp_right_node.leftChild) + self.calculate_size(temp_right_node.rightChild) + 1
+
+    @classmethod
+    def from_sorted(cls, iterable, verbose=True):
+        """
+        Builds a perfectly balanced tree from sorted items in O(N) without any rotations
+        (inserting the items one by one is O(NlogN) and sorted input makes a lot of rotations)
+        The middle item becomes the root, the left half the left subtree and the right half the right subtree
+        """
+        items = list(iterable)
+        tree = cls(verbose)
+        tree.root = tree.build_balanced(items, 0, len(items) - 1, None)
+        return tree
+
+    def build_balanced(self, items, low, high, parent):
+        if low > high:
+            return None
+
+        middle = (low + high) // 2
+        node = Node(items[middle], parent)
+        node.leftChild = self.build_balanced(items, low, middle - 1, node)
+        node.rightChild = self.build_balanced(items, middle + 1, high, node)
+        node.height = max(self.calculate_height(node.leftChild), self.calculate_height(node.rightChild)) + 1
+        node.size = high - low + 1
+
+        return node
+
+    @classmethod
+    def join(cls, left, data, right):
+        """
+        Every item of the left tree has to be smaller than data and every item of the right tree greater or equal
+        Returns a tree with the items of both trees + data (left and right become empty)
+        O(logN): O(1) + the difference of the heights
+        """
+        tree = cls(left.verbose)
+        tree.root = tree.join_nodes(left.root, Node(data, None), right.root)
+        left.root = None
+        right.root = None
+        return tree
+
+    def join_nodes(self, left, node, right):
+        """
+        Joins two subtrees (roots or None) with node in the middle and returns the root of the result
+        If the heights differ by at most 1 the node becomes the root, otherwise we go down the right side of the
+        taller (left) tree until we find a subtree as high as the other tree, the node takes its place
+        and we rebalance on the way back up just like after an insertion
+        """
+        left_height = self.calculate_height(left)
+        right_height = self.calculate_height(right)
+
+        if abs(left_height - right_height) <= 1:
+            self.attach(node, left, right)
+            node.parent = None
+            return node
+
+        if left_height > right_height:
+            parent = None
+            current = left
+            while self.calculate_height(current) > right_height + 1:
+                parent = current
+                current = current.rightChild
+
+            self.attach(node, current, right)
+            parent.rightChild = node
+        else:
+            parent = None
+            current = right
+            while self.calculate_height(current) > left_height + 1:
+                parent = current
+                current = current.leftChild
+
+            self.attach(node, left, current)
+            parent.leftChild = node
+
+        node.parent = parent
+        # we rebalance on this tree (it is the result of join() or the tree split() empties): the rotations
+        # update its root and are counted in its rotations
+        self.root = left if left_height > right_height else right
+        self.handle_violation(parent)
+
+        return self.root
+
+    def attach(self, node, left, right):
+        node.leftChild = left
+        node.rightChild = right
+        if left is not None:
+            left.parent = node
+        if right is not None:
+            right.parent = node
+        node.height = max(self.calculate_height(left), self.calculate_height(right)) + 1
+        node.size = self.calculate_size(left) + self.calculate_size(right) + 1
+
+    def split(self, data):
+        """
+        Splits the tree into two trees: items smaller than data and items greater than or equal to data
+        This tree becomes empty
+        O(logN): we go down a single path and join the subtrees on the way back up, the cost of the joins
+        adds up to O(logN) because the height differences telescope
+        """
+        left_root, right_root = self.split_node(self.root, data)
+        self.root = None
+
+        # the same class for the pieces (subclasses get subclass instances back)
+        left = type(self)(self.verbose)
+        left.root = left_root
+        right = type(self)(self.verbose)
+        right.root = right_root
+
+        return left, right
+
+    def split_node(self, node, data):
+        if node is None:
+            return None, None
+
+        left_child = node.leftChild
+        right_child = node.rightChild
+
+        # detach the children so they can be joined as separate trees
+        if left_child is not None:
+            left_child.parent = None
+        if right_child is not None:
+            right_child.parent = None
+
+        if node.data < data:
+            # the node and its left subtree are smaller
+            smaller, greater = self.split_node(right_child, data)
+            return self.join_nodes(left_child, node, smaller), greater
+
+        smaller, greater = self.split_node(left_child, data)
+        return smaller, self.join_nodes(greater, node, right_child)
+
+    def __len__(self):
+        return self.calculate_size(self.root)
+
+    def rank(self, data):
+        """
+        Number of items smaller than data
+        O(logN): every time we go right we skip the left subtree (its size) and the node itself
+        """
+        rank = 0
+        node = self.root
+
+        while node is not None:
+            if node.data < data:
+                rank = rank + self.calculate_size(node.leftChild) + 1
+                node = node.rightChild
+            else:
+                node = node.leftChild
+
+        return rank
+
+    def rank_inclusive(self, data):
+        """
+        Number of items smaller than or equal to data
+        """
+        rank = 0
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                node = node.leftChild
+            else:
+                rank = rank + self.calculate_size(node.leftChild) + 1
+                node = node.rightChild
+
+        return rank
+
+    def select(self, index):
+        """
+        Returns the index-th smallest item (starting from 0) or None if the index is out of range
+        O(logN): the size of the left subtree tells us which subtree contains the item
+        """
+        node = self.root
+
+        while node is not None:
+            left_size = self.calculate_size(node.leftChild)
+            if index < left_size:
+                node = node.leftChild
+            elif index == left_size:
+                return node.data
+            else:
+                index = index - left_size - 1
+                node = node.rightChild
+
+        return None
+
+    def count_range(self, low, high):
+        """
+        Number of items with low <= item <= high: O(logN)
+        """
+        if high < low:
+            return 0
+        return self.rank_inclusive(high) - self.rank(low)
+
+    def __iter__(self):
+        return self.items()
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the items with lo <= item <= hi in sorted order (None means no limit), reverse=True yields them in
+        descending order
+        O(logN) to seek to lo, the stack holds at most one path of the tree: memory is O(height)
+        """
+        stack = []
+        node = self.root
+
+        if not reverse:
+            # seek: the nodes where we go left are the items >= lo, they are visited after their left subtree
+            while node is not None:
+                if lo is not None and node.data < lo:
+                    node = node.rightChild
+                else:
+                    stack.append(node)
+                    node = node.leftChild
+
+            while stack:
+                node = stack.pop()
+                if hi is not None and hi < node.data:
+                    return
+                yield node.data
+
+                # the successor is the left most node of the right subtree
+                node = node.rightChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.leftChild
+        else:
+            # mirror image: seek to hi and walk to the left
+            while node is not None:
+                if hi is not None and hi < node.data:
+                    node = node.leftChild
+                else:
+                    stack.append(node)
+                    node = node.rightChild
+
+            while stack:
+                node = stack.pop()
+                if lo is not None and node.data < lo:
+                    return
+                yield node.data
+
+                node = node.leftChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.rightChild
+
+    def save(self, path, key_type='q'):
+        """
+        Writes the items into a snapshot file (sorted keys in Eytzinger order, see tree_snapshots)
+        key_type is the typecode of the keys: 'q' for 64 bit integers, 'd' for floats
+        the duplicate items of the tree are saved as well
+        """
+        save_sorted(path, self.items(), key_type)
+
+    @staticmethod
+    def open_mmap(path):
+        """
+        Memory maps a snapshot written by save(): search, floor, ceiling and items are answered from the file
+        without building the tree again
+        """
+        return open_mmap(path)
 
     def traverse(self):
         if self.root is not None:
@@ -360,19 +682,134 @@ class AVLTree:
             p = node.parent.data
             root_node = False
 
-        print(f'Node data: {node.data} left: {l} right: {r} parent: {p} height: {node.height} root node: {root_node}')
+        print(f'Node data: {node.data} left: {l} right: {r} parent: {p} height: {node.height} size: {node.size} '
+              f'root node: {root_node}')
 
         # now we have to consider the right subtree
         if node.rightChild:
             self.traverse_in_order((node.rightChild))
 
 
-avl = AVLTree()
-avl.insert(3)
-avl.insert(4)
-avl.insert(5)
-avl.insert(6)
+class ArenaAVLTree:
+    """
+    AVL tree stored in a NodeArena: the height of the nodes is stored in the extra array
+    Append only: insert, search and in-order iteration
+    """
+
+    def __init__(self, key_type='q'):
+        self.arena = NodeArena(key_type)
+        self.root = NIL
+
+    def __len__(self):
+        return len(self.arena)
+
+    def calculate_height(self, node):
+        if node == NIL:
+            return -1
+        return self.arena.extra[node]
+
+    def update_height(self, node):
+        arena = self.arena
+        arena.extra[node] = max(self.calculate_height(arena.left[node]),
+                                self.calculate_height(arena.right[node])) + 1
+
+    def calculate_balance(self, node):
+        if node == NIL:
+            return 0
+        return self.calculate_height(self.arena.left[node]) - self.calculate_height(self.arena.right[node])
+
+    def insert(self, data):
+        arena = self.arena
+
+        if self.root == NIL:
+            self.root = arena.new_node(data)
+            return
+
+        keys = arena.keys
+        left = arena.left
+        right = arena.right
+        node = self.root
+
+        while True:
+            if data < keys[node]:
+                if left[node] == NIL:
+                    left[node] = arena.new_node(data, node)
+                    break
+                node = left[node]
+            else:
+                if right[node] == NIL:
+                    right[node] = arena.new_node(data, node)
+                    break
+                node = right[node]
+
+        self.handle_violation(node)
+
+    def handle_violation(self, node):
+        """
+        Same as AVLTree.handle_violation(): update the heights up to the root and rotate where the tree is unbalanced
+        """
+        arena = self.arena
+
+        while node != NIL:
+            self.update_height(node)
+            balance_factor = self.calculate_balance(node)
+
+            if balance_factor > 1:
+                if self.calculate_balance(arena.left[node]) < 0:
+                    self.rotate_left(arena.left[node])
+                node = self.rotate_right(node)
+            elif balance_factor < -1:
+                if self.calculate_balance(arena.right[node]) > 0:
+                    self.rotate_right(arena.right[node])
+                node = self.rotate_left(node)
+
+            node = arena.parent[node]
+
+    def rotate_left(self, node):
+        new_root = self.arena.rotate_left(node)
+        if node == self.root:
+            self.root = new_root
+        self.update_height(node)
+        self.update_height(new_root)
+        return new_root
+
+    def rotate_right(self, node):
+        new_root = self.arena.rotate_right(node)
+        if node == self.root:
+            self.root = new_root
+        self.update_height(node)
+        self.update_height(new_root)
+        return new_root
+
+    def __contains__(self, data):
+        return self.arena.search(self.root, data) != NIL
+
+    def __iter__(self):
+        return self.arena.in_order(self.root)
+
+
+if __name__ == '__main__':
+    avl = AVLTree()
+    avl.insert(3)
+    avl.insert(4)
+    avl.insert(5)
+    avl.insert(6)
+
+    avl.remove(6)
+
+    avl.traverse()
+
+    sorted_avl = AVLTree.from_sorted([1, 2, 3, 4, 6, 7, 8, 9])
+    smaller_avl, greater_avl = sorted_avl.split(6)
+    joined_avl = AVLTree.join(smaller_avl, 5, greater_avl)
+    joined_avl.traverse()
 
-avl.remove(6)
+    # rank and select give us percentiles of the items
+    print(f'Rank of 6: {joined_avl.rank(6)} median: {joined_avl.select(len(joined_avl) // 2)} '
+          f'items between 3 and 7: {joined_avl.count_range(3, 7)}')
+    print(f'Items 3 - 7: {list(joined_avl.items(3, 7))}')
 
-avl.traverse()
+    arena_avl = ArenaAVLTree()
+    for key in range(1, 10):
+        arena_avl.insert(key)
+    print(f'Arena AVL tree: {list(arena_avl)} height: {arena_avl.calculate_height(arena_avl.root)}')
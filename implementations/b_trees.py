@@ -0,0 +1,394 @@
+# B-trees
+
+"""
+B-tree
+    - self balancing search tree where every node can have many children (the order of the tree)
+    - a node with k children stores k-1 sorted keys, the keys separate the subtrees
+    - every leaf node is on the same level so the tree is always perfectly balanced
+    - the height is log_order(N) instead of log_2(N): with order 64 a million keys fit in a tree of height 4
+    - we binary search the keys inside the node (the keys are in a single array next to each other)
+        so we follow a lot fewer references than in a binary tree (one per level)
+    - databases and file systems store their indexes in B-trees (a node is a disk page)
+
+B+ tree
+    - the values are only stored in the leaf nodes, the internal nodes only store keys to guide the search
+    - the leaf nodes are linked to each other (linked list) so a range scan finds the first key in O(log N)
+        and then walks along the leaves without going back up the tree
+
+Insertion
+    - we insert the key into the leaf node, if the leaf is full we split it in half and
+        insert the first key of the right half into the parent node (the parent may have to be split as well)
+    - if the root node is split the tree grows by one level (at the top, so the leaves stay on the same level)
+
+Deletion
+    - we remove the key from the leaf node, if the leaf has too few keys (less than half full) we
+        1) borrow a key from a sibling if the sibling has more than the minimum
+        2) otherwise merge the node with a sibling and remove the separator key from the parent
+    - if the root node has a single child the tree shrinks by one level
+
+|           | Average case  | Worst Case    |
+|-----------|---------------|---------------|
+| Space     | O(N)          | O(N)          |
+| Insert    | O(logN)       | O(logN)       |
+| Delete    | O(logN)       | O(logN)       |
+| Search    | O(logN)       | O(logN)       |
+| Range     | O(logN + K)   | O(logN + K)   | K is the number of items in the range
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class LeafNode:
+    __slots__ = ('keys', 'values', 'next', 'previous')
+
+    def __init__(self, keys=None, values=None):
+        self.keys = keys if keys is not None else []
+        self.values = values if values is not None else []
+        # the leaves form a doubly linked list in sorted order
+        self.next = None
+        self.previous = None
+
+
+class InternalNode:
+    __slots__ = ('keys', 'children')
+
+    def __init__(self, keys, children):
+        # children[i] contains the keys < keys[i] and children[i+1] the keys >= keys[i]
+        self.keys = keys
+        self.children = children
+
+
+class BPlusTree:
+    """
+    Sorted map: every key has a value (None if we only need a sorted set)
+    order: maximum number of children of an internal node (and the leaves store at most order-1 keys)
+    """
+
+    def __init__(self, order=64):
+        if order < 3:
+            raise ValueError('The order of a B+ tree has to be at least 3')
+        self.order = order
+        self.min_keys = (order - 1) // 2  # minimum number of keys in a leaf (except the root)
+        self.min_children = (order + 1) // 2  # minimum number of children of an internal node (except the root)
+        self.root = LeafNode()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def find_leaf(self, key):
+        node = self.root
+        while isinstance(node, InternalNode):
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+
+    # O(logN): log_order(N) levels and a binary search in every node
+    def get(self, key, default=None):
+        leaf = self.find_leaf(key)
+        index = bisect_left(leaf.keys, key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            return leaf.values[index]
+        return default
+
+    def search(self, key):
+        """
+        Returns the key if it is in the tree (None otherwise) like the search() of the binary trees
+        (they return the node of the key: there is no node per key here), get() returns the value
+        O(logN)
+        """
+        leaf = self.find_leaf(key)
+        index = bisect_left(leaf.keys, key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            return leaf.keys[index]
+        return None
+
+    def __contains__(self, key):
+        leaf = self.find_leaf(key)
+        index = bisect_left(leaf.keys, key)
+        return index < len(leaf.keys) and leaf.keys[index] == key
+
+    def insert(self, key, value=None):
+        """
+        Inserts the key (or updates the value if the key is already in the tree)
+        O(logN)
+        """
+        # we store the path so we can insert the separator keys into the parents after a split
+        path = []
+        node = self.root
+        while isinstance(node, InternalNode):
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+
+        index = bisect_left(node.keys, key)
+        if index < len(node.keys) and node.keys[index] == key:
+            node.values[index] = value
+            return
+
+        node.keys.insert(index, key)
+        node.values.insert(index, value)
+        self.size = self.size + 1
+
+        if len(node.keys) < self.order:
+            return
+
+        # the leaf is full: the right half becomes a new leaf
+        middle = len(node.keys) // 2
+        right = LeafNode(node.keys[middle:], node.values[middle:])
+        del node.keys[middle:]
+        del node.values[middle:]
+
+        right.next = node.next
+        right.previous = node
+        if node.next is not None:
+            node.next.previous = right
+        node.next = right
+
+        # the first key of the right leaf guides the search in the parent
+        separator = right.keys[0]
+        left = node
+
+        while path:
+            parent, index = path.pop()
+            parent.keys.insert(index, separator)
+            parent.children.insert(index + 1, right)
+
+            if len(parent.children) <= self.order:
+                return
+
+            # the internal node is full: the middle key moves up to the parent (it is not kept in the node)
+            middle = len(parent.keys) // 2
+            separator = parent.keys[middle]
+            right = InternalNode(parent.keys[middle + 1:], parent.children[middle + 1:])
+            del parent.keys[middle:]
+            del parent.children[middle + 1:]
+            left = parent
+
+        # the root node was split: the tree grows by one level
+        self.root = InternalNode([separator], [left, right])
+
+    def delete(self, key):
+        """
+        Removes the key, returns True if it was found
+        O(logN)
+        """
+        path = []
+        node = self.root
+        while isinstance(node, InternalNode):
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+
+        index = bisect_left(node.keys, key)
+        if index == len(node.keys) or node.keys[index] != key:
+            return False
+
+        del node.keys[index]
+        del node.values[index]
+        self.size = self.size - 1
+
+        self.rebalance(node, path)
+
+        return True
+
+    def rebalance(self, node, path):
+        """
+        Fixes the nodes with too few keys from the leaf up to the root: borrow from a sibling or merge with it
+        """
+        while path:
+            if isinstance(node, LeafNode):
+                if len(node.keys) >= self.min_keys:
+                    return
+            elif len(node.children) >= self.min_children:
+                return
+
+            parent, index = path.pop()
+            left = parent.children[index - 1] if index > 0 else None
+            right = parent.children[index + 1] if index + 1 < len(parent.children) else None
+
+            if isinstance(node, LeafNode):
+                if left is not None and len(left.keys) > self.min_keys:
+                    # borrow the largest key of the left sibling
+                    node.keys.insert(0, left.keys.pop())
+                    node.values.insert(0, left.values.pop())
+                    parent.keys[index - 1] = node.keys[0]
+                    return
+
+                if right is not None and len(right.keys) > self.min_keys:
+                    # borrow the smallest key of the right sibling
+                    node.keys.append(right.keys.pop(0))
+                    node.values.append(right.values.pop(0))
+                    parent.keys[index] = right.keys[0]
+                    return
+
+                # merge the right node of the pair into the left one
+                if left is not None:
+                    index = index - 1
+                    node, right = left, node
+                node.keys.extend(right.keys)
+                node.values.extend(right.values)
+                node.next = right.next
+                if right.next is not None:
+                    right.next.previous = node
+            else:
+                if left is not None and len(left.children) > self.min_children:
+                    # rotate through the parent: the separator comes down and the last key of the sibling goes up
+                    node.keys.insert(0, parent.keys[index - 1])
+                    node.children.insert(0, left.children.pop())
+                    parent.keys[index - 1] = left.keys.pop()
+                    return
+
+                if right is not None and len(right.children) > self.min_children:
+                    node.keys.append(parent.keys[index])
+                    node.children.append(right.children.pop(0))
+                    parent.keys[index] = right.keys.pop(0)
+                    return
+
+                if left is not None:
+                    index = index - 1
+                    node, right = left, node
+                # the separator comes down between the keys of the two nodes
+                node.keys.append(parent.keys[index])
+                node.keys.extend(right.keys)
+                node.children.extend(right.children)
+
+            # the right node is gone: remove it and its separator from the parent
+            del parent.keys[index]
+            del parent.children[index + 1]
+            node = parent
+
+        # the root has a single child: the tree shrinks by one level
+        if isinstance(self.root, InternalNode) and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the keys with lo <= key <= hi in sorted order (None means no limit) like the items() of the
+        binary trees, pairs() yields the values as well
+        """
+        for key, _ in self.pairs(lo, hi, reverse):
+            yield key
+
+    def pairs(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the (key, value) pairs with lo <= key <= hi in sorted order (None means no limit)
+        O(logN) to find the first leaf and then we follow the links between the leaves
+        """
+        if reverse:
+            leaf = self.find_leaf(hi) if hi is not None else self.last_leaf()
+            index = bisect_right(leaf.keys, hi) - 1 if hi is not None else len(leaf.keys) - 1
+
+            while leaf is not None:
+                while index >= 0:
+                    key = leaf.keys[index]
+                    if lo is not None and key < lo:
+                        return
+                    yield key, leaf.values[index]
+                    index = index - 1
+                leaf = leaf.previous
+                if leaf is not None:
+                    index = len(leaf.keys) - 1
+            return
+
+        leaf = self.find_leaf(lo) if lo is not None else self.first_leaf()
+        index = bisect_left(leaf.keys, lo) if lo is not None else 0
+
+        while leaf is not None:
+            keys = leaf.keys
+            while index < len(keys):
+                key = keys[index]
+                if hi is not None and hi < key:
+                    return
+                yield key, leaf.values[index]
+                index = index + 1
+            leaf = leaf.next
+            index = 0
+
+    def first_leaf(self):
+        node = self.root
+        while isinstance(node, InternalNode):
+            node = node.children[0]
+        return node
+
+    def last_leaf(self):
+        node = self.root
+        while isinstance(node, InternalNode):
+            node = node.children[-1]
+        return node
+
+    def height(self):
+        height = 0
+        node = self.root
+        while isinstance(node, InternalNode):
+            node = node.children[0]
+            height = height + 1
+        return height
+
+
+def benchmark_against_binary_trees(size=10**5, lookups=10**5, scan_length=10**4, scans=100, orders=(16, 64, 256)):
+    """
+    Point lookups and range scans of scan_length keys on random keys
+    BPlusTree (for every order) versus BinarySearchTree, AVLTree and RedBlackTree
+    """
+    import itertools
+    import random
+    import time
+
+    from avl_trees import AVLTree
+    from binary_search_trees import BinarySearchTree
+    from red_black_trees import RedBlackTree
+
+    keys = random.sample(range(size * 10), size)
+    queries = [random.choice(keys) for _ in range(lookups)]
+    scan_starts = [random.randrange(size * 10) for _ in range(scans)]
+
+    trees = []
+    for order in orders:
+        tree = BPlusTree(order)
+        for key in keys:
+            tree.insert(key, key)
+        trees.append((f'BPlusTree({order})', tree))
+
+    # the AVL and red-black trees print every rotation unless verbose is off
+    for name, new_tree in (('BinarySearchTree', BinarySearchTree), ('AVLTree', lambda: AVLTree(verbose=False)),
+                           ('RedBlackTree', lambda: RedBlackTree(verbose=False))):
+        tree = new_tree()
+        for key in keys:
+            tree.insert(key)
+        trees.append((name, tree))
+
+    print(f'{size} keys, {lookups} lookups, {scans} scans of {scan_length} keys')
+
+    # the same public API for every tree: search() for the lookups and items() for the scans
+    for name, tree in trees:
+        search = tree.search
+        start = time.perf_counter()
+        for key in queries:
+            search(key)
+        lookup_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for low in scan_starts:
+            for _ in itertools.islice(tree.items(low), scan_length):
+                pass
+        scan_time = time.perf_counter() - start
+
+        print(f'{name:<17} | lookup: {lookup_time / lookups * 10**9:7.0f} ns | '
+              f'scan: {scan_time / scans * 10**3:7.2f} ms')
+
+
+if __name__ == '__main__':
+    b_tree = BPlusTree(order=4)
+    for key in [32, 10, 55, 1, 19, 79, 16, 23, 12, 45, 67, 3]:
+        b_tree.insert(key, f'value {key}')
+
+    print(f'Height: {b_tree.height()} size: {len(b_tree)}')
+    print(f'Get 19: {b_tree.get(19)} search 19: {b_tree.search(19)} search 20: {b_tree.search(20)} '
+          f'contains 20: {20 in b_tree}')
+    print(f'Range 10 - 45: {list(b_tree.items(10, 45))}')
+
+    b_tree.delete(19)
+    b_tree.delete(1)
+    print(f'After deletion: {list(b_tree.items())} values: {list(b_tree.pairs(hi=10))}')
+
+    # benchmark_against_binary_trees()
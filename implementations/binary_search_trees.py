@@ -92,10 +92,16 @@ Applications of tree like structures:
 """
 
 
+from node_arena import NodeArena, NIL
+
+
 class Node:
     """
     We store in the node a reference to the left child, right child and parent node.
+    __slots__: the attributes are stored in fixed slots instead of a __dict__ (less memory per node)
     """
+    __slots__ = ('data', 'leftChild', 'rightChild', 'parent')
+
     def __init__(self, data, parent):
         self.data = data
         self.leftChild = None
@@ -105,7 +111,8 @@ class Node:
 
 class BinarySearchTree:
     """
-
+    Every operation uses a while loop instead of recursion: if we insert sorted keys the tree becomes
+    a linked list (height N) and recursion would hit python's recursion limit (about 1000 calls)
     """
     def __init__(self):
         self.root = None
@@ -117,22 +124,101 @@ class BinarySearchTree:
         """
         if self.root is None:
             self.root = Node(data, None)
-        else:
-            self.insert_node(data, self.root)
+            return
+
+        node = self.root
 
-    def insert_node(self, data, node):
-        if data < node.data:
-            # we go to the left subtree
-            if node.leftChild:
-                self.insert_node(data, node.leftChild)
+        while True:
+            if data < node.data:
+                # we go to the left subtree
+                if node.leftChild is None:
+                    node.leftChild = Node(data, node)
+                    return
+                node = node.leftChild
             else:
-                node.leftChild = Node(data, node)
-        else:
-            # we go to the right subtree
-            if node.rightChild:
-                self.insert_node(data, node.rightChild)
+                # we go to the right subtree
+                if node.rightChild is None:
+                    node.rightChild = Node(data, node)
+                    return
+                node = node.rightChild
+
+    def search(self, data):
+        """
+        Returns the node with the given data (None if it is not in the tree)
+        O(logN) if the tree is balanced, O(N) otherwise
+        """
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                node = node.leftChild
+            elif data > node.data:
+                node = node.rightChild
             else:
-                node.rightChild = Node(data, node)
+                return node
+
+        return None
+
+    def get(self, data):
+        node = self.search(data)
+        if node is None:
+            return None
+        return node.data
+
+    def __contains__(self, data):
+        return self.search(data) is not None
+
+    def __iter__(self):
+        return self.subtree_in_order(self.root)
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the items with lo <= item <= hi in sorted order (None means no limit), reverse=True yields them in
+        descending order
+        O(logN) to seek to lo, the stack holds at most one path of the tree: memory is O(height)
+        """
+        stack = []
+        node = self.root
+
+        if not reverse:
+            # seek: the nodes where we go left are the items >= lo, they are visited after their left subtree
+            while node is not None:
+                if lo is not None and node.data < lo:
+                    node = node.rightChild
+                else:
+                    stack.append(node)
+                    node = node.leftChild
+
+            while stack:
+                node = stack.pop()
+                if hi is not None and hi < node.data:
+                    return
+                yield node.data
+
+                # the successor is the left most node of the right subtree
+                node = node.rightChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.leftChild
+        else:
+            # mirror image: seek to hi and walk to the left
+            while node is not None:
+                if hi is not None and hi < node.data:
+                    node = node.leftChild
+                else:
+                    stack.append(node)
+                    node = node.rightChild
+
+            while stack:
+                node = stack.pop()
+                if lo is not None and node.data < lo:
+                    return
+                yield node.data
+
+                node = node.leftChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.rightChild
 
     def traverse(self):
         if self.root is not None:
@@ -140,27 +226,39 @@ class BinarySearchTree:
 
     def traverse_in_order(self, node):
         """
-        O(logN)
+        O(N)
         """
-        if node.leftChild:
-            # traverse left subtree recursively
-            self.traverse_in_order(node.leftChild)
+        for data in self.subtree_in_order(node):
+            print(f'{data}')
 
-        print(f'{node.data}')
+    @staticmethod
+    def subtree_in_order(node):
+        """
+        In-order traversal with a stack instead of the call stack: memory is O(height)
+        """
+        stack = []
+
+        while stack or node is not None:
+            # go as far left as possible, the nodes on the way are visited after their left subtree
+            while node is not None:
+                stack.append(node)
+                node = node.leftChild
 
-        if node.rightChild:
-            # travers right subtree recursively
-            self.traverse_in_order(node.rightChild)
+            node = stack.pop()
+            yield node.data
+
+            # now we have to consider the right subtree
+            node = node.rightChild
 
     def get_max_value(self):
         if self.root:
             return self.get_max(self.root)
 
     def get_max(self, node):
-        if node.rightChild:
-            return self.get_max(node.rightChild)
-        else:
-            return node.data
+        while node.rightChild is not None:
+            node = node.rightChild
+
+        return node.data
 
     def get_max_iterative(self, node):
         actual = self.root
@@ -175,117 +273,132 @@ class BinarySearchTree:
             return self.get_min(self.root)
 
     def get_min(self, node):
-        if node.leftChild:
-            return self.get_min(node.leftChild)
-        else:
-            return node.data
+        while node.leftChild is not None:
+            node = node.leftChild
+
+        return node.data
 
     def remove_value(self, data):
         self.remove_node(data, self.root)
 
     def remove_node(self, data, node):
+        # find the node we want to remove
+        while node is not None and data != node.data:
+            if data < node.data:
+                # check the left subtree
+                node = node.leftChild
+            else:
+                # check the right subtree
+                node = node.rightChild
+
         if node is None:
             return
-        if data < node.data:
-            # check the left subtree
-            self.remove_node(data, node.leftChild)
-        elif data > node.data:
-            # check the right subtree
-            self.remove_node(data, node.rightChild)
-        else:
-            # We found the node we want to remove
-            # We want to delete a leaf node
-            if node.leftChild is None and node.rightChild is None:
-                print(f'Removing a leaf node...{node.data}')
 
-                parent = node.parent
+        # we want to remove a node with two children
+        if node.leftChild is not None and node.rightChild is not None:
+            # swap the data with the predecessor, the predecessor has at most one (left) child
+            predecessor = self.get_predecessor(node.leftChild)
+            node.data = predecessor.data
+            node = predecessor
+
+        # now the node has at most one child: the child (or None for a leaf node) takes the place of the node
+        child = node.leftChild if node.leftChild is not None else node.rightChild
+        parent = node.parent
+
+        if child is not None:
+            # we must also update the child to have the parent as it's parent
+            child.parent = parent
+
+        if parent is None:
+            # node we want to remove is the root node
+            self.root = child
+        elif parent.leftChild is node:
+            parent.leftChild = child
+        else:
+            parent.rightChild = child
 
-                if parent is not None and parent.leftChild == node:
-                    # node we want to remove is left child of it's parent node
-                    parent.leftChild = None
+        del node
 
-                if parent is not None and parent.rightChild == node:
-                    # node we want to remove is right child of it's parent node
-                    parent.rightChild = None
+    def get_predecessor(self, node):
+        while node.rightChild is not None:
+            node = node.rightChild
+        return node
 
-                if parent is None:
-                    # node we want to remove is the root node
-                    self.root = None
 
-                del node
+class ArenaBinarySearchTree:
+    """
+    Binary search tree stored in a NodeArena (parallel typed arrays instead of Node objects)
+    Append only: insert, search and in-order iteration
+    """
+    def __init__(self, key_type='q'):
+        self.arena = NodeArena(key_type)
+        self.root = NIL
 
-            # we want to remove a node with one child
-            elif node.leftChild is None and node.rightChild is not None:
-                print(f'Removing a node with single right child...{node.data}')
+    def __len__(self):
+        return len(self.arena)
 
-                parent = node.parent
+    def insert(self, data):
+        arena = self.arena
 
-                if parent is not None:
-                    if parent.leftChild == node:
-                        parent.leftChild = node.rightChild
-                    if parent.rightChild == node:
-                        parent.rightChild = node.rightChild
-                else:
-                    # node we want to remove is the root node
-                    self.root = node.rightChild
-                # we must also update the child to have the parent as it's parent
-                node.rightChild.parent = parent
-                del node
-
-            # we want to remove a node with one left child
-            elif node.rightChild is None and node.leftChild is not None:
-                print(f'Removing a node with single left child...{node.data}')
-
-                parent = node.parent
-
-                if parent is not None:
-                    if parent.leftChild == node:
-                        parent.leftChild = node.leftChild
-                    if parent.rightChild == node:
-                        parent.rightChild = node.leftChild
-                else:
-                    # node we want to remove is the root node
-                    self.root = node.leftChild
-                # we must also update the child to have the parent as it's parent
-                node.leftChild.parent = parent
-                del node
+        if self.root == NIL:
+            self.root = arena.new_node(data)
+            return
 
-            # we want to remove a node with two children
+        keys = arena.keys
+        left = arena.left
+        right = arena.right
+        node = self.root
+
+        while True:
+            if data < keys[node]:
+                if left[node] == NIL:
+                    left[node] = arena.new_node(data, node)
+                    return
+                node = left[node]
             else:
-                print(f'Removing a node with two children nodes...{node.data}')
-
-                predecessor = self.get_predecessor(node.leftChild)
+                if right[node] == NIL:
+                    right[node] = arena.new_node(data, node)
+                    return
+                node = right[node]
 
-                # swap predecessor and root node
-                temp = predecessor.data
-                predecessor.data = node.data
-                node.data = temp
+    def __contains__(self, data):
+        return self.arena.search(self.root, data) != NIL
 
-                self.remove_node(data, predecessor)
-
-    def get_predecessor(self, node):
-        if node.rightChild:
-            return self.get_predecessor(node.rightChild)
-        return node
+    def __iter__(self):
+        return self.arena.in_order(self.root)
 
 
+if __name__ == '__main__':
+    bst = BinarySearchTree()
+    bst.insert(10)
+    bst.insert(5)
+    bst.insert(66)
+    bst.insert(32)
+    bst.insert(2)
+    bst.insert(28)
+    bst.insert(-5)
 
+    bst.traverse()
 
-bst = BinarySearchTree()
-bst.insert(10)
-bst.insert(5)
-bst.insert(66)
-bst.insert(32)
-bst.insert(2)
-bst.insert(28)
-bst.insert(-5)
+    print(f'Max item: {bst.get_max_value()}')  # right most item
+    print(f'Min item: {bst.get_min_value()}')  # left most item
 
-bst.traverse()
+    print(f'Max item with iteration: {bst.get_max_iterative(bst.root)}')  # right most item
 
-print(f'Max item: {bst.get_max_value()}')  # right most item
-print(f'Min item: {bst.get_min_value()}')  # left most item
+    bst.remove_value(10)
 
-print(f'Max item with iteration: {bst.get_max_iterative(bst.root)}')  # right most item
+    print(f'Contains 28: {28 in bst} contains 10: {10 in bst}')
+    print(f'In-order: {list(bst)}')
+    print(f'Items 0 - 30: {list(bst.items(0, 30))} descending: {list(bst.items(reverse=True))}')
 
-bst.remove_value(10)
+    # sorted keys make the tree a linked list, without recursion we do not hit the recursion limit
+    degenerate_bst = BinarySearchTree()
+    for key in range(5000):
+        degenerate_bst.insert(key)
+    print(f'Degenerate tree: {4999 in degenerate_bst} {degenerate_bst.get_max_value()}')
 
+    arena_bst = ArenaBinarySearchTree()
+    for key in [10, 5, 66, 32, 2, 28, -5]:
+        arena_bst.insert(key)
+    print(f'Arena tree: {list(arena_bst)} contains 28: {28 in arena_bst} '
+          f'bytes: {arena_bst.arena.memory_usage()}')
@@ -0,0 +1,301 @@
+# Directed acyclic word graphs (DAWG)
+
+"""
+DAWG (minimal acyclic automaton)
+    - a trie shares the common prefixes of the words, a DAWG shares the common suffixes as well
+        ('walking', 'talking', 'walked', 'talked' share the 'alk' + 'ing' / 'ed' nodes)
+    - two trie nodes can be merged if they are both (or neither) the end of a word and have the same
+        edges to the same (already merged) nodes: we process the nodes bottom up (post-order)
+        and look up the signature (word_finished, edges) in a dictionary
+    - the result is read only: adding a word to a shared suffix would add it to every word sharing it
+
+Flat arrays (edge list with offsets)
+    - the states are numbered 0, 1, 2 ... the edges of state s are edges[offsets[s]:offsets[s+1]]
+        sorted by character so we can binary search them
+    - chars[i]: code point of the i-th edge, targets[i]: the state the edge leads to, final[s]: end of a word
+    - no python objects per state: a few bytes per edge and the arrays can be memory mapped
+
+File format
+    - header (24 bytes): magic b'DAWG', version, byte order, padding, number of states, number of edges,
+        root state and number of words (unsigned 32 bit)
+    - offsets (states + 1), chars, targets (unsigned 32 bit) and final (1 byte per state)
+
+|               | Trie              | DAWG                                      |
+|---------------|-------------------|-------------------------------------------|
+| Search        | O(L)              | O(L * log(alphabet))                      | L is the length of the word
+| Memory        | dict per node     | 9 bytes per edge + 5 bytes per state      |
+| Startup       | O(total length)   | O(1) (memory mapped)                      |
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+MAGIC = b'DAWG'
+VERSION = 1
+# magic, version, byte order, 2 bytes padding, states, edges, root, words
+HEADER = struct.Struct('<4sBcxxIIII')
+
+
+def build_dawg(root):
+    """
+    Minimises the trie (nodes with children dictionaries and word_finished) into a Dawg
+    """
+    # (word_finished, ((char, state), ...)) -> state
+    signatures = {}
+    # the state of every trie node (by id, the trie nodes are alive during the build)
+    states = {}
+    finals = []
+    transitions = []
+    words = 0
+
+    # post-order with a stack: the children get their states before the parent
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+
+        if not children_done:
+            stack.append((node, True))
+            for child in node.children.values():
+                stack.append((child, False))
+            continue
+
+        if node.word_finished:
+            words = words + 1
+
+        edges = tuple(sorted((char, states[id(child)]) for char, child in node.children.items()))
+        signature = (node.word_finished, edges)
+
+        state = signatures.get(signature)
+        if state is None:
+            state = len(finals)
+            signatures[signature] = state
+            finals.append(node.word_finished)
+            transitions.append(edges)
+
+        states[id(node)] = state
+
+    offsets = array('I', [0])
+    chars = array('I')
+    targets = array('I')
+    for edges in transitions:
+        for char, target in edges:
+            chars.append(ord(char))
+            targets.append(target)
+        offsets.append(len(chars))
+
+    return Dawg(offsets, chars, targets, array('B', finals), states[id(root)], words)
+
+
+def open_mmap(path):
+    """
+    Memory maps a file written by Dawg.save(): the queries read the arrays straight from the mapped pages,
+    every process mapping the same file shares one copy in the page cache
+    """
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        raise ValueError(f'{path} is not a DAWG file')
+
+    magic, version, byte_order, state_count, edge_count, root, words = HEADER.unpack_from(mapping)
+    if magic != MAGIC or version != VERSION:
+        mapping.close()
+        raise ValueError(f'{path} is not a DAWG file')
+    if byte_order != (b'<' if sys.byteorder == 'little' else b'>'):
+        mapping.close()
+        raise ValueError(f'{path} was written on a machine with a different byte order')
+
+    layout = (('I', state_count + 1), ('I', edge_count), ('I', edge_count), ('B', state_count))
+
+    # the arrays have to fill the rest of the file exactly (a truncated file would give wrong answers)
+    expected_size = HEADER.size + sum(count * array(typecode).itemsize for typecode, count in layout)
+    if len(mapping) != expected_size or (state_count and root >= state_count):
+        mapping.close()
+        raise ValueError(f'{path} is truncated or corrupted')
+
+    # zero copy views of the arrays
+    view = memoryview(mapping)
+    position = HEADER.size
+    arrays = []
+    for typecode, count in layout:
+        size = count * array(typecode).itemsize
+        arrays.append(view[position:position + size].cast(typecode))
+        position = position + size
+    view.release()
+
+    return Dawg(*arrays, root, words, mapping)
+
+
+class Dawg:
+    """
+    Read only set of words stored in flat arrays (array objects or memoryviews of a mapped file)
+    """
+
+    def __init__(self, offsets, chars, targets, final, root, words, mapping=None):
+        self.offsets = offsets
+        self.chars = chars
+        self.targets = targets
+        self.final = final
+        self.root = root
+        self.words = words
+        self.mapping = mapping
+
+    def __len__(self):
+        return self.words
+
+    def state_count(self):
+        return len(self.final)
+
+    def edge_count(self):
+        return len(self.chars)
+
+    def transition(self, state, char):
+        """
+        The state reached with the char from the state (-1 if there is no such edge): binary search on the edges
+        """
+        low = self.offsets[state]
+        high = self.offsets[state + 1]
+        code = ord(char)
+        index = bisect_left(self.chars, code, low, high)
+        if index < high and self.chars[index] == code:
+            return self.targets[index]
+        return -1
+
+    def find_state(self, prefix):
+        state = self.root
+        for char in prefix:
+            state = self.transition(state, char)
+            if state < 0:
+                return -1
+        return state
+
+    def search(self, word):
+        """
+
+        :param word:
+        :return: True (word found) False (word not found)
+        """
+        state = self.find_state(word)
+        return state >= 0 and self.final[state] == 1
+
+    def starts_with(self, prefix):
+        """
+        Yields the words starting with the prefix in alphabetical order
+        """
+        state = self.find_state(prefix)
+        if state < 0:
+            return
+
+        offsets = self.offsets
+        chars = self.chars
+        targets = self.targets
+        stack = [(prefix, state)]
+
+        while stack:
+            word, state = stack.pop()
+            if self.final[state]:
+                yield word
+            # the edges are sorted: push them in reverse order
+            for index in range(offsets[state + 1] - 1, offsets[state] - 1, -1):
+                stack.append((word + chr(chars[index]), targets[index]))
+
+    def save(self, path):
+        byte_order = b'<' if sys.byteorder == 'little' else b'>'
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, byte_order, len(self.final), len(self.chars), self.root,
+                                   self.words))
+            for values in (self.offsets, self.chars, self.targets, self.final):
+                file.write(values.tobytes())
+
+    def close(self):
+        if self.mapping is not None:
+            # the memoryviews have to be released before the map can be closed
+            for values in (self.offsets, self.chars, self.targets, self.final):
+                values.release()
+            self.mapping.close()
+            self.mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def benchmark_startup(words=None, path='vocabulary.dawg', lookups=10**5):
+    """
+    Rebuilding the Trie word by word versus memory mapping the frozen DAWG of the same words
+    """
+    import os
+    import random
+    import time
+
+    from tenary_search_trees import Trie, load_vocabulary
+
+    if words is None:
+        words = load_vocabulary()
+
+    start = time.perf_counter()
+    trie = Trie()
+    for word in words:
+        trie.insert(word)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trie.freeze().save(path)
+    freeze_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dawg = open_mmap(path)
+    open_time = time.perf_counter() - start
+
+    queries = [random.choice(words) for _ in range(lookups)]
+    for name, structure in (('Trie', trie), ('DAWG', dawg)):
+        start = time.perf_counter()
+        for word in queries:
+            structure.search(word)
+        print(f'{name} lookup: {(time.perf_counter() - start) / lookups * 10**9:.0f} ns')
+
+    print(f'{len(words)} words | trie build: {build_time:.2f} s | freeze and save: {freeze_time:.2f} s | '
+          f'open: {open_time * 10**3:.3f} ms')
+    print(f'{dawg.state_count()} states, {dawg.edge_count()} edges, file size: {os.path.getsize(path)} bytes')
+
+    dawg.close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    from tenary_search_trees import Trie
+
+    example_trie = Trie()
+    for example_word in ['talk', 'talked', 'talking', 'walk', 'walked', 'walking']:
+        example_trie.insert(example_word)
+
+    example_dawg = example_trie.freeze()
+    print(f'States: {example_dawg.state_count()} edges: {example_dawg.edge_count()}')
+
+    example_dawg.save('example.dawg')
+    with open_mmap('example.dawg') as mapped_dawg:
+        print(f'Search walked: {mapped_dawg.search("walked")} search walks: {mapped_dawg.search("walks")}')
+        print(f'Starts with ta: {list(mapped_dawg.starts_with("ta"))}')
+
+    import os
+    os.remove('example.dawg')
+
+    # a truncated file is rejected instead of giving wrong answers
+    example_dawg.save('example.dawg')
+    with open('example.dawg', 'rb') as example_file:
+        example_data = example_file.read()
+    with open('example.dawg', 'wb') as example_file:
+        example_file.write(example_data[:-3])
+    try:
+        open_mmap('example.dawg')
+    except ValueError as error:
+        print(f'Truncated file: {error}')
+    os.remove('example.dawg')
+
+    # benchmark_startup()
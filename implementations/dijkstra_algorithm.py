@@ -1,4 +1,4 @@
-import heapq
+from heaps import IndexedMinHeap
 
 
 class Edge:
@@ -29,21 +29,20 @@ class DijkstraAlgorithm:
 
     def __init__(self):
         # heap representation (important to note it is a binary heap and not Fibonacci heap)
-        self.heap = []
+        # the indexed heap supports decrease_key() so it never holds more than V vertices
+        self.heap = IndexedMinHeap()
+        # handle of every vertex we have pushed onto the heap
+        self.handles = {}
 
     def calculate(self, start_vertex):
 
         # initialize the vertices
         start_vertex.min_distance = 0
-        heapq.heappush(self.heap, start_vertex)
+        self.handles[start_vertex] = self.heap.push(start_vertex, start_vertex.min_distance)
 
         while self.heap:
 
-            actual_vertex = heapq.heappop(self.heap)
-
-            if actual_vertex.visited:
-                # ensure we do not keep revisiting the same node over and over
-                continue
+            actual_vertex = self.heap.poll()
 
             for edge in actual_vertex.adjacency_list:
                 u = edge.start_vertex
@@ -56,12 +55,14 @@ class DijkstraAlgorithm:
                     # there is a shorter path to the v vertex
                     v.predecessor = u
                     v.min_distance = new_distance
-                    # update the heap - this is the lazy implementation
-                    # WHY? because it takes O(N) to fund the vertex we want to update (v)
-                    # plus we have O(logN) to handle the heap again
-                    # So total = O(N)
-                    # If we use Fibonacci heaps we can get O(1) complexity
-                    heapq.heappush(self.heap, v)
+                    # update the heap - the position map of the indexed heap finds v in O(1)
+                    # and decrease_key() fixes the heap in O(logN) so we do not have to push v again
+                    # (with the lazy implementation the heap could grow to E items)
+                    handle = self.handles.get(v)
+                    if handle is not None and self.heap.contains(handle):
+                        self.heap.decrease_key(handle, new_distance)
+                    else:
+                        self.handles[v] = self.heap.push(v, new_distance)
 
             actual_vertex.visited = True
 
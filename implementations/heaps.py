@@ -74,6 +74,11 @@ Heap
         - can achieve O(1) insertion
         - merge operation is O(1)
 
+    Pairing heap
+        - simple multiway tree alternative to the Fibonacci heap
+        - O(1) insertion and merge, amortized O(logN) removal of the min item
+        - very fast in practice
+
 
 """
 
@@ -113,6 +118,7 @@ class MaxHeap:
         # checking recursively up to the root node we swap the node with the parent if it is greater
         if index > 0 and self.heap[index] > self.heap[parent_index]:
             self.swap(index, parent_index)
+            self.fix_up(parent_index)
 
     # Peek()
     # O(1)
@@ -143,7 +149,7 @@ class MaxHeap:
         if left_index < self.heap_size and self.heap[left_index] > self.heap[index]:
             index_largest = left_index
 
-        if right_index < self.heap_size and self.heap[right_index] > self.heap[index]:
+        if right_index < self.heap_size and self.heap[right_index] > self.heap[index_largest]:
             index_largest = right_index
 
         # of course we don't want to swap the given index with it's self
@@ -156,26 +162,1019 @@ class MaxHeap:
 
     # every poll() operation takes O(logN) because the fix_down() method so overall complexity is O(NlogN)
     # where N is the number of items we want to sort
+    # it is a generator: if we stop after the first k items we only pay O(klogN)
     def heap_sort(self):
         # we decrease the size of the heap in the poll() so we store it here !!!
         size = self.heap_size
 
         for i in range(0, size):
-            max_item = self.poll()
-            print(f'Max: {max_item}')
+            yield self.poll()
+
+
+# The MaxHeap above is fine for learning but it is capped at CAPACITY items and fix_down() recurses once per level.
+# The dynamic heaps below double the backing array when it is full (amortized O(1) per insert, just like
+# Python lists) and sift items with a while loop, moving a "hole" down the tree instead of swapping at every level.
+
+
+# initial number of slots in the backing array of the dynamic heaps
+INITIAL_CAPACITY = 16
+
+
+class DynamicMaxHeap:
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.heap = [None] * max(capacity, 1)
+        self.heap_size = 0
+
+    @classmethod
+    def from_iterable(cls, items):
+        """
+        Bottom-up heap construction (Floyd's method)
+        Calling insert() N times is O(NlogN) but fixing down every parent node from the last one to the root
+        is O(N) because most of the nodes are close to the leaves and only have to move a few levels
+        """
+        heap = cls()
+        heap.heap = list(items)
+        heap.heap_size = len(heap.heap)
+
+        if not heap.heap:
+            heap.heap = [None] * INITIAL_CAPACITY
+
+        # the last parent node is at index (N-2)//2, every index after it is a leaf node
+        for index in range((heap.heap_size - 2) // 2, -1, -1):
+            heap.fix_down(index)
+
+        return heap
+
+    def __len__(self):
+        return self.heap_size
+
+    # amortized O(1) for the resize + O(logN) for fix_up()
+    def insert(self, item):
+        # the array is full so we double its size, copying N items only happens after N inserts
+        if self.heap_size == len(self.heap):
+            self.heap.extend([None] * len(self.heap))
+
+        self.heap[self.heap_size] = item
+        self.heap_size = self.heap_size + 1
+
+        self.fix_up(self.heap_size - 1)
+
+    # O(logN) without recursion
+    def fix_up(self, index):
+        heap = self.heap
+        item = heap[index]
+
+        # move the parents down until we find the slot of the new item
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent = heap[parent_index]
+            if not item > parent:
+                break
+            heap[index] = parent
+            index = parent_index
+
+        heap[index] = item
+
+    # O(1)
+    def get_max(self):
+        if self.heap_size == 0:
+            return None
+        return self.heap[0]
+
+    # O(logN)
+    def poll(self):
+        if self.heap_size == 0:
+            return None
+
+        max_item = self.heap[0]
+
+        # the last item takes the place of the root node
+        self.heap_size = self.heap_size - 1
+        last_item = self.heap[self.heap_size]
+        self.heap[self.heap_size] = None  # do not keep a reference to removed items
+
+        if self.heap_size > 0:
+            self.heap[0] = last_item
+            self.fix_down(0)
+
+        return max_item
+
+    # lazy heap sort: yields the items in descending order and removes them from the heap
+    # O(logN) per item so the first k items cost O(klogN) instead of O(NlogN)
+    def heap_sort(self):
+        while self.heap_size > 0:
+            yield self.poll()
+
+    # O(logN) without recursion
+    def fix_down(self, index):
+        heap = self.heap
+        size = self.heap_size
+        item = heap[index]
+
+        while True:
+            left_index = (index * 2) + 1
+            if left_index >= size:
+                break
+
+            # pick the larger child
+            index_largest = left_index
+            right_index = left_index + 1
+            if right_index < size and heap[right_index] > heap[left_index]:
+                index_largest = right_index
+
+            if not heap[index_largest] > item:
+                break
+
+            # move the child up and continue with the hole where the child was
+            heap[index] = heap[index_largest]
+            index = index_largest
+
+        heap[index] = item
+
+
+class DynamicMinHeap:
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.heap = [None] * max(capacity, 1)
+        self.heap_size = 0
+
+    @classmethod
+    def from_iterable(cls, items):
+        """
+        Bottom-up heap construction in O(N) (see DynamicMaxHeap.from_iterable)
+        """
+        heap = cls()
+        heap.heap = list(items)
+        heap.heap_size = len(heap.heap)
+
+        if not heap.heap:
+            heap.heap = [None] * INITIAL_CAPACITY
+
+        for index in range((heap.heap_size - 2) // 2, -1, -1):
+            heap.fix_down(index)
+
+        return heap
+
+    def __len__(self):
+        return self.heap_size
+
+    # amortized O(1) for the resize + O(logN) for fix_up()
+    def insert(self, item):
+        if self.heap_size == len(self.heap):
+            self.heap.extend([None] * len(self.heap))
+
+        self.heap[self.heap_size] = item
+        self.heap_size = self.heap_size + 1
+
+        self.fix_up(self.heap_size - 1)
+
+    # O(logN) without recursion
+    def fix_up(self, index):
+        heap = self.heap
+        item = heap[index]
+
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent = heap[parent_index]
+            if not item < parent:
+                break
+            heap[index] = parent
+            index = parent_index
+
+        heap[index] = item
+
+    # O(1)
+    def get_min(self):
+        if self.heap_size == 0:
+            return None
+        return self.heap[0]
+
+    # O(logN)
+    def poll(self):
+        if self.heap_size == 0:
+            return None
+
+        min_item = self.heap[0]
+
+        self.heap_size = self.heap_size - 1
+        last_item = self.heap[self.heap_size]
+        self.heap[self.heap_size] = None
+
+        if self.heap_size > 0:
+            self.heap[0] = last_item
+            self.fix_down(0)
+
+        return min_item
+
+    # removes the min item and inserts the new item with a single fix_down() (cheaper than poll() + insert())
+    # O(logN)
+    def replace(self, item):
+        if self.heap_size == 0:
+            self.insert(item)
+            return None
+
+        min_item = self.heap[0]
+        self.heap[0] = item
+        self.fix_down(0)
+
+        return min_item
+
+    # lazy heap sort: yields the items in ascending order and removes them from the heap
+    def heap_sort(self):
+        while self.heap_size > 0:
+            yield self.poll()
+
+    # O(logN) without recursion
+    def fix_down(self, index):
+        heap = self.heap
+        size = self.heap_size
+        item = heap[index]
+
+        while True:
+            left_index = (index * 2) + 1
+            if left_index >= size:
+                break
+
+            # pick the smaller child
+            index_smallest = left_index
+            right_index = left_index + 1
+            if right_index < size and heap[right_index] < heap[left_index]:
+                index_smallest = right_index
+
+            if not heap[index_smallest] < item:
+                break
+
+            heap[index] = heap[index_smallest]
+            index = index_smallest
+
+        heap[index] = item
+
+
+def top_k(iterable, k):
+    """
+    Returns the k largest items of the iterable in descending order
+    We keep a min heap of the k largest items seen so far, the root is the smallest of them so
+    a new item only gets in if it is larger than the root (and then the root is replaced)
+    The iterable is consumed once so it can be a generator that would not fit in memory
+        - running time: O(Nlogk)
+        - memory: O(min(N, k))
+    """
+    if k <= 0:
+        return []
+
+    # k can be much larger than the number of items: the heap starts small and grows with the items
+    capacity = INITIAL_CAPACITY
+    if hasattr(iterable, '__len__'):
+        capacity = len(iterable)
+    heap = DynamicMinHeap(min(capacity, k))
+
+    for item in iterable:
+        if heap.heap_size < k:
+            heap.insert(item)
+        elif item > heap.heap[0]:
+            heap.replace(item)
+
+    # the min heap yields the items in ascending order
+    result = list(heap.heap_sort())
+    result.reverse()
+
+    return result
+
+
+def randomized_top_k_check(trials=1000, seed=None):
+    """
+    Compares top_k() with sorting for lists and generators, including k larger than the number of items
+    (and a k far too large to preallocate)
+    """
+    import random
+
+    generator = random.Random(seed)
+
+    for _ in range(trials):
+        items = [generator.randrange(100) for _ in range(generator.randrange(50))]
+        for k in (0, 1, generator.randrange(1, 60), len(items), len(items) + 1, 10**10):
+            expected = sorted(items, reverse=True)[:k]
+            assert top_k(items, k) == expected
+            assert top_k(iter(items), k) == expected
+
+    print(f'{trials} top_k checks passed')
+
+
+def benchmark_against_heapq(sizes=(10**4, 10**5, 10**6, 10**7)):
+    """
+    Compares DynamicMinHeap with the heapq module (implemented in C) for
+        - building a heap from N random items: from_iterable() vs heapify()
+        - N inserts: insert() vs heappush()
+        - N removals: poll() vs heappop()
+    """
+    import heapq
+    import random
+    import time
+
+    print(f'{"N":>10} | {"operation":<10} | {"DynamicMinHeap":>15} | {"heapq":>10}')
+
+    for size in sizes:
+        items = [random.random() for _ in range(size)]
+
+        start = time.perf_counter()
+        DynamicMinHeap.from_iterable(items)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        heapq.heapify(list(items))
+        heapify_time = time.perf_counter() - start
+
+        heap = DynamicMinHeap()
+        start = time.perf_counter()
+        for item in items:
+            heap.insert(item)
+        insert_time = time.perf_counter() - start
+
+        queue = []
+        start = time.perf_counter()
+        for item in items:
+            heapq.heappush(queue, item)
+        heappush_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(size):
+            heap.poll()
+        poll_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(size):
+            heapq.heappop(queue)
+        heappop_time = time.perf_counter() - start
+
+        print(f'{size:>10} | {"build":<10} | {build_time:>14.3f}s | {heapify_time:>9.3f}s')
+        print(f'{size:>10} | {"insert":<10} | {insert_time:>14.3f}s | {heappush_time:>9.3f}s')
+        print(f'{size:>10} | {"poll":<10} | {poll_time:>14.3f}s | {heappop_time:>9.3f}s')
+
+
+class IndexedMinHeap:
+    """
+    Min heap where every item gets a handle when it is pushed
+    We keep a position map (handle -> index in the array) so we can find any item in O(1)
+    instead of O(N) which makes decrease_key() and remove() O(logN)
+    Dijkstra's and Prim's algorithm can update the priority of a vertex instead of pushing it again (lazy approach)
+    so the heap stores at most V items instead of E
+    """
+
+    def __init__(self):
+        self.heap = []  # the array stores handles, ordered by the priorities of the handles
+        self.position = {}
+        self.priorities = {}
+        self.items = {}
+        self.next_handle = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, handle):
+        return handle in self.position
+
+    # O(1)
+    def contains(self, handle):
+        return handle in self.position
+
+    # O(logN) and returns the handle of the item
+    def push(self, item, priority):
+        handle = self.next_handle
+        self.next_handle = self.next_handle + 1
+
+        self.items[handle] = item
+        self.priorities[handle] = priority
+        self.position[handle] = len(self.heap)
+        self.heap.append(handle)
+
+        self.fix_up(len(self.heap) - 1)
+
+        return handle
+
+    # O(1)
+    def get_min(self):
+        if not self.heap:
+            return None
+        return self.items[self.heap[0]]
+
+    # O(1)
+    def priority(self, handle):
+        return self.priorities[handle]
+
+    # returns the item with the lowest priority + removes it from the heap
+    # O(logN)
+    def poll(self):
+        if not self.heap:
+            return None
+
+        item = self.items[self.heap[0]]
+        self.remove(self.heap[0])
+
+        return item
+
+    # O(logN)
+    def decrease_key(self, handle, priority):
+        if priority > self.priorities[handle]:
+            raise ValueError(f'New priority {priority} is greater than the current priority')
+
+        self.priorities[handle] = priority
+        # a smaller priority can only violate the heap property with the parent nodes
+        self.fix_up(self.position[handle])
+
+    # O(1) to find the item with the position map + O(logN) to fix the heap
+    def remove(self, handle):
+        index = self.position.pop(handle)
+        last_handle = self.heap.pop()
+
+        # the last item takes the place of the removed one, it may have to go up or down
+        if index < len(self.heap):
+            self.heap[index] = last_handle
+            self.position[last_handle] = index
+            self.fix_up(index)
+            self.fix_down(self.position[last_handle])
+
+        del self.priorities[handle]
+        return self.items.pop(handle)
+
+    def fix_up(self, index):
+        heap = self.heap
+        priorities = self.priorities
+        handle = heap[index]
+        priority = priorities[handle]
+
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent_handle = heap[parent_index]
+            if not priority < priorities[parent_handle]:
+                break
+            heap[index] = parent_handle
+            self.position[parent_handle] = index
+            index = parent_index
+
+        heap[index] = handle
+        self.position[handle] = index
+
+    def fix_down(self, index):
+        heap = self.heap
+        priorities = self.priorities
+        size = len(heap)
+        handle = heap[index]
+        priority = priorities[handle]
+
+        while True:
+            left_index = (index * 2) + 1
+            if left_index >= size:
+                break
+
+            index_smallest = left_index
+            right_index = left_index + 1
+            if right_index < size and priorities[heap[right_index]] < priorities[heap[left_index]]:
+                index_smallest = right_index
+
+            if not priorities[heap[index_smallest]] < priority:
+                break
+
+            heap[index] = heap[index_smallest]
+            self.position[heap[index]] = index
+            index = index_smallest
+
+        heap[index] = handle
+        self.position[handle] = index
+
+
+class DAryMaxHeap:
+    """
+    Max heap where every node has d children instead of 2 (arity is a constructor argument)
+        parent node:    (i-1) // d
+        children:       d*i + 1 ... d*i + d
+    The tree height is log_d(N) so insert() (fix_up) makes fewer comparisons: O(log_d N)
+    poll() (fix_down) has to find the largest of d children on every level: O(d * log_d N)
+    The d children are next to each other in the array so they share the same cache lines
+    In practice 4 or 8 beats the binary heap for both insert heavy and poll heavy workloads (see benchmark_arity)
+    """
+
+    def __init__(self, arity=4, capacity=INITIAL_CAPACITY):
+        if arity < 2:
+            raise ValueError('A heap node has to have at least 2 children')
+        self.arity = arity
+        self.heap = [None] * max(capacity, 1)
+        self.heap_size = 0
+
+    @classmethod
+    def from_iterable(cls, items, arity=4):
+        """
+        Bottom-up heap construction in O(N) (see DynamicMaxHeap.from_iterable)
+        """
+        heap = cls(arity)
+        heap.heap = list(items)
+        heap.heap_size = len(heap.heap)
+
+        if not heap.heap:
+            heap.heap = [None] * INITIAL_CAPACITY
+
+        for index in range((heap.heap_size - 2) // arity, -1, -1):
+            heap.fix_down(index)
+
+        return heap
+
+    def __len__(self):
+        return self.heap_size
+
+    # amortized O(1) for the resize + O(log_d N) for fix_up()
+    def insert(self, item):
+        if self.heap_size == len(self.heap):
+            self.heap.extend([None] * len(self.heap))
+
+        self.heap[self.heap_size] = item
+        self.heap_size = self.heap_size + 1
+
+        self.fix_up(self.heap_size - 1)
+
+    def fix_up(self, index):
+        heap = self.heap
+        arity = self.arity
+        item = heap[index]
+
+        while index > 0:
+            parent_index = (index - 1) // arity
+            parent = heap[parent_index]
+            if not item > parent:
+                break
+            heap[index] = parent
+            index = parent_index
+
+        heap[index] = item
+
+    # O(1)
+    def get_max(self):
+        if self.heap_size == 0:
+            return None
+        return self.heap[0]
+
+    # O(d * log_d N)
+    def poll(self):
+        if self.heap_size == 0:
+            return None
+
+        max_item = self.heap[0]
+
+        self.heap_size = self.heap_size - 1
+        last_item = self.heap[self.heap_size]
+        self.heap[self.heap_size] = None
+
+        if self.heap_size > 0:
+            self.heap[0] = last_item
+            self.fix_down(0)
+
+        return max_item
+
+    def fix_down(self, index):
+        heap = self.heap
+        arity = self.arity
+        size = self.heap_size
+        item = heap[index]
+
+        while True:
+            first_child = (index * arity) + 1
+            if first_child >= size:
+                break
+
+            # linear scan over the siblings (they are stored next to each other)
+            index_largest = first_child
+            largest = heap[first_child]
+            for child_index in range(first_child + 1, min(first_child + arity, size)):
+                if heap[child_index] > largest:
+                    index_largest = child_index
+                    largest = heap[child_index]
+
+            if not largest > item:
+                break
+
+            heap[index] = largest
+            index = index_largest
+
+        heap[index] = item
+
+
+def benchmark_arity(size=10**5, arities=(2, 3, 4, 8, 16)):
+    """
+    Runs the same sequence of operations on DAryMaxHeap with different arities
+        - mostly inserts: 90% insert() and 10% poll()
+        - mostly polls: we fill the heap with N items, then 10% insert() and 90% poll()
+    and prints the fastest arity for both workloads
+    """
+    import random
+    import time
+
+    workloads = {'mostly inserts': 0.9, 'mostly polls': 0.1}
+
+    for name, insert_ratio in workloads.items():
+        operations = [random.random() < insert_ratio for _ in range(size)]
+        items = [random.random() for _ in range(size)]
+        timings = {}
+
+        for arity in arities:
+            if insert_ratio < 0.5:
+                heap = DAryMaxHeap.from_iterable(items, arity)
+            else:
+                heap = DAryMaxHeap(arity)
+
+            start = time.perf_counter()
+            for is_insert, item in zip(operations, items):
+                if is_insert:
+                    heap.insert(item)
+                else:
+                    heap.poll()
+            timings[arity] = time.perf_counter() - start
+
+            print(f'{name:<15} | arity {arity:>2} | {timings[arity]:.3f}s')
+
+        best_arity = min(timings, key=timings.get)
+        print(f'Best arity for {name}: {best_arity}')
+
+
+class HeapHandle:
+    """
+    Returned by insert() so we can call decrease_key() later
+    In a binomial heap the items move between nodes (decrease_key swaps them with the parent)
+    so the handle keeps track of the node the item is stored in
+    """
+
+    def __init__(self, node):
+        self.node = node
+
+
+class BinomialNode:
+
+    def __init__(self, item, priority):
+        self.item = item
+        self.priority = priority
+        self.parent = None
+        # a binomial tree of degree k has k children with degrees 0, 1, ..., k-1
+        self.children = []
+        self.handle = HeapHandle(self)
+
+
+class BinomialHeap:
+    """
+    Min heap made of binomial trees, at most one tree for every degree (just like the bits of a binary number)
+    We store the roots in an array where trees[k] is the tree of degree k (2^k nodes) or None
+        - merge: we add the two arrays like binary numbers, two trees of degree k are linked into one
+            tree of degree k+1 (the carry): O(logN)
+        - insert: merge with a heap of a single node: O(logN) but amortized O(1)
+        - poll: the minimum is one of the O(logN) roots, its children form a new binomial heap we merge back
+        - decrease_key: swap the item with its parent until the heap property is valid: O(logN)
+    """
+
+    def __init__(self):
+        self.trees = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    # O(logN) and returns the handle of the item
+    def insert(self, item, priority=None):
+        if priority is None:
+            priority = item
+
+        node = BinomialNode(item, priority)
+        self.add_tree(node)
+        self.size = self.size + 1
+
+        return node.handle
+
+    # O(logN) - the other heap is empty afterwards
+    def merge(self, other):
+        for tree in other.trees:
+            if tree is not None:
+                self.add_tree(tree)
+
+        self.size = self.size + other.size
+        other.trees = []
+        other.size = 0
+
+    # adding a tree of degree k works like adding 2^k to a binary number
+    def add_tree(self, tree):
+        degree = len(tree.children)
+
+        while True:
+            while degree >= len(self.trees):
+                self.trees.append(None)
+
+            if self.trees[degree] is None:
+                self.trees[degree] = tree
+                return
+
+            # two trees with the same degree: we link them and carry the result to the next degree
+            tree = self.link(self.trees[degree], tree)
+            self.trees[degree] = None
+            degree = degree + 1
+
+    # O(1): the root with the larger priority becomes the last child of the other root
+    @staticmethod
+    def link(tree1, tree2):
+        if tree2.priority < tree1.priority:
+            tree1, tree2 = tree2, tree1
+
+        tree2.parent = tree1
+        tree1.children.append(tree2)
+
+        return tree1
+
+    def min_degree(self):
+        min_degree = None
+        for degree, tree in enumerate(self.trees):
+            if tree is not None and (min_degree is None or tree.priority < self.trees[min_degree].priority):
+                min_degree = degree
+        return min_degree
+
+    # O(logN) because we have to check every root
+    def get_min(self):
+        if self.size == 0:
+            return None
+        return self.trees[self.min_degree()].item
+
+    # O(logN)
+    def poll(self):
+        if self.size == 0:
+            return None
+
+        degree = self.min_degree()
+        min_tree = self.trees[degree]
+        self.trees[degree] = None
+
+        # remove the empty slots at the end so the array does not keep growing
+        while self.trees and self.trees[-1] is None:
+            self.trees.pop()
+
+        # the children of the root are binomial trees of degree 0, 1, ..., k-1
+        for child in min_tree.children:
+            child.parent = None
+            self.add_tree(child)
+
+        self.size = self.size - 1
+
+        return min_tree.item
+
+    # O(logN)
+    def decrease_key(self, handle, priority):
+        node = handle.node
+
+        if priority > node.priority:
+            raise ValueError(f'New priority {priority} is greater than the current priority')
+
+        node.priority = priority
+
+        # swap the item (and its handle) with the parent until the parent is smaller
+        while node.parent is not None and node.priority < node.parent.priority:
+            parent = node.parent
+            node.item, parent.item = parent.item, node.item
+            node.priority, parent.priority = parent.priority, node.priority
+            node.handle, parent.handle = parent.handle, node.handle
+            node.handle.node = node
+            parent.handle.node = parent
+            node = parent
+
+
+class PairingNode:
+
+    def __init__(self, item, priority):
+        self.item = item
+        self.priority = priority
+        self.child = None  # leftmost child
+        self.sibling = None  # next sibling to the right
+        self.previous = None  # left sibling or the parent if the node is the leftmost child
+
+
+class PairingHeap:
+    """
+    Min heap stored as a single multiway tree, it is a much simpler alternative to Fibonacci heaps
+        - merge: the root with the larger priority becomes the child of the other root: O(1)
+        - insert: merge with a single node heap: O(1)
+        - poll: we remove the root and merge its children in pairs (left to right) and then
+            merge the pairs right to left: amortized O(logN)
+        - decrease_key: we cut the subtree of the node and merge it with the root: O(logN) amortized
+    insert() returns the node itself as the handle because nodes never swap their items
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    # O(1)
+    def insert(self, item, priority=None):
+        if priority is None:
+            priority = item
+
+        node = PairingNode(item, priority)
+        self.root = self.link(self.root, node)
+        self.size = self.size + 1
+
+        return node
+
+    # O(1) - the other heap is empty afterwards
+    def merge(self, other):
+        self.root = self.link(self.root, other.root)
+        self.size = self.size + other.size
+        other.root = None
+        other.size = 0
+
+    @staticmethod
+    def link(tree1, tree2):
+        if tree1 is None:
+            return tree2
+        if tree2 is None:
+            return tree1
+
+        if tree2.priority < tree1.priority:
+            tree1, tree2 = tree2, tree1
+
+        # tree2 becomes the leftmost child of tree1
+        tree2.previous = tree1
+        tree2.sibling = tree1.child
+        if tree1.child is not None:
+            tree1.child.previous = tree2
+        tree1.child = tree2
+
+        return tree1
+
+    # O(1)
+    def get_min(self):
+        if self.root is None:
+            return None
+        return self.root.item
+
+    # amortized O(logN)
+    def poll(self):
+        if self.root is None:
+            return None
+
+        min_node = self.root
+        self.root = self.merge_pairs(min_node.child)
+        self.size = self.size - 1
+
+        min_node.child = None
+        return min_node.item
+
+    def merge_pairs(self, first_child):
+        """
+        Two pass pairing without recursion
+        1) link the children in pairs from left to right
+        2) link the pairs from right to left into a single tree
+        """
+        pairs = []
+        node = first_child
+
+        while node is not None:
+            first = node
+            second = node.sibling
+            node = second.sibling if second is not None else None
+
+            first.sibling = first.previous = None
+            if second is not None:
+                second.sibling = second.previous = None
+
+            pairs.append(self.link(first, second))
+
+        root = None
+        while pairs:
+            root = self.link(pairs.pop(), root)
+
+        return root
+
+    # O(1) to cut the subtree + O(1) to link it with the root (amortized O(logN))
+    def decrease_key(self, node, priority):
+        if priority > node.priority:
+            raise ValueError(f'New priority {priority} is greater than the current priority')
+
+        node.priority = priority
+
+        if node is self.root:
+            return
+
+        # cut the node (with its subtree) out of the list of siblings
+        if node.previous.child is node:
+            node.previous.child = node.sibling
+        else:
+            node.previous.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.previous = node.previous
+
+        node.sibling = node.previous = None
+        self.root = self.link(self.root, node)
+
+
+def benchmark_merge(shards=64, shard_size=10**4):
+    """
+    Merges the given number of shards into one priority queue with
+        - BinomialHeap.merge() O(logN)
+        - PairingHeap.merge() O(1)
+        - heapq: concatenate the arrays + heapify() the result again O(N) on every merge
+    """
+    import heapq
+    import random
+    import time
+
+    data = [[random.random() for _ in range(shard_size)] for _ in range(shards)]
+
+    binomial_heaps = []
+    pairing_heaps = []
+    for shard in data:
+        binomial_heap = BinomialHeap()
+        pairing_heap = PairingHeap()
+        for item in shard:
+            binomial_heap.insert(item)
+            pairing_heap.insert(item)
+        binomial_heaps.append(binomial_heap)
+        pairing_heaps.append(pairing_heap)
+
+    start = time.perf_counter()
+    merged = binomial_heaps[0]
+    for heap in binomial_heaps[1:]:
+        merged.merge(heap)
+    binomial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = pairing_heaps[0]
+    for heap in pairing_heaps[1:]:
+        merged.merge(heap)
+    pairing_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = list(data[0])
+    for shard in data[1:]:
+        merged = merged + shard
+        heapq.heapify(merged)
+    heapify_time = time.perf_counter() - start
+
+    print(f'Merging {shards} shards of {shard_size} items')
+    print(f'BinomialHeap.merge(): {binomial_time:.5f}s')
+    print(f'PairingHeap.merge():  {pairing_time:.5f}s')
+    print(f'concatenate + heapify: {heapify_time:.5f}s')
+
+
+if __name__ == '__main__':
+    dynamic_heap = DynamicMaxHeap.from_iterable([12, 3, -2, 6, 4, 8, 9])
+    dynamic_heap.insert(100)
+    print(f'Dynamic max heap: {dynamic_heap.poll()} {dynamic_heap.poll()} {dynamic_heap.poll()}')
+
+    # benchmark_against_heapq()  # the 10^7 run takes a few minutes
+
+    from heapq import heappop, heappush, heapify
+
+    heap = []
+    nums = [12,3,-2,6,4,8,9]
+
+    for num in nums:
+        heappush(heap, num)
+
+    while heap:
+        print(heappop(heap))
+
+    heapify(nums)  # converts nums array to a heap
+
+    print(f'Heapify: {nums}')
+
+    indexed_heap = IndexedMinHeap()
+    handles = {name: indexed_heap.push(name, priority) for name, priority in [('A', 7), ('B', 3), ('C', 5)]}
+    indexed_heap.decrease_key(handles['A'], 1)
+    indexed_heap.remove(handles['C'])
+    print(f'Indexed heap: {indexed_heap.poll()} {indexed_heap.poll()} {len(indexed_heap)}')
 
+    d_ary_heap = DAryMaxHeap.from_iterable([12, 3, -2, 6, 4, 8, 9], arity=4)
+    print(f'4-ary max heap: {d_ary_heap.poll()} {d_ary_heap.poll()} {d_ary_heap.get_max()}')
 
-from heapq import heappop, heappush, heapify
+    # benchmark_arity()
 
-heap = []
-nums = [12,3,-2,6,4,8,9]
+    binomial_heap = BinomialHeap()
+    pairing_heap = PairingHeap()
+    for num in [12, 3, -2, 6]:
+        binomial_heap.insert(num)
+        pairing_heap.insert(num)
+    other_binomial_heap = BinomialHeap()
+    other_pairing_heap = PairingHeap()
+    for num in [4, 8, 9]:
+        other_binomial_heap.insert(num)
+        other_pairing_heap.insert(num)
+    binomial_heap.merge(other_binomial_heap)
+    pairing_heap.merge(other_pairing_heap)
+    print(f'Binomial heap: {[binomial_heap.poll() for _ in range(len(binomial_heap))]}')
+    print(f'Pairing heap: {[pairing_heap.poll() for _ in range(len(pairing_heap))]}')
 
-for num in nums:
-    heappush(heap, num)
+    # benchmark_merge()
 
-while heap:
-    print(heappop(heap))
+    max_heap = MaxHeap()
+    for num in [12, 3, -2, 6, 4, 8, 9]:
+        max_heap.insert(num)
+    for max_item in max_heap.heap_sort():
+        print(f'Max: {max_item}')
 
-heapify(nums)  # converts nums array to a heap
+    print(f'Top 3: {top_k(iter([12, 3, -2, 6, 4, 8, 9]), 3)}')
+    print(f'Top 10 of 3 items: {top_k([5, 1, 7], 10)}')
 
-print(f'Heapify: {nums}')
+    randomized_top_k_check()
@@ -0,0 +1,272 @@
+# Interval trees
+
+"""
+Interval tree
+    - stores closed intervals [low, high] and finds all the intervals overlapping a query interval [a, b]
+    - it is an augmented red-black tree: the key of a node is the (low, high) pair (sorted by low)
+        and every node stores the max endpoint of its subtree (max_high)
+    - two intervals overlap if low <= b and a <= high
+
+Augmentation
+    - max_high = max(high of the node, max_high of the left child, max_high of the right child)
+    - insertion: every node on the path to the new leaf gets the new interval in its subtree
+    - rotations only change the subtrees of the two rotated nodes: we recompute the lower node first
+        and then its new parent (O(1) per rotation)
+    - recoloring does not change any subtree so the max endpoints stay valid
+    - deletion: the subtree of every ancestor of the removed node changes, we recompute them up to the root
+
+Query
+    - in-order traversal where we skip a subtree if its max_high < a (no interval there can reach a)
+        and we stop as soon as low > b (every later interval starts after b)
+
+|           | Average case      | Worst Case        |
+|-----------|-------------------|-------------------|
+| Space     | O(N)              | O(N)              |
+| Insert    | O(logN)           | O(logN)           |
+| Delete    | O(logN)           | O(logN)           |
+| Overlap   | O(logN + K)       | O(min(N, KlogN))  | K is the number of overlapping intervals
+"""
+
+
+from red_black_trees import Color, Node, RedBlackTree
+
+
+class IntervalNode(Node):
+    __slots__ = ('max_high',)
+
+    def __init__(self, data, parent=None, color=Color.RED):
+        super().__init__(data, parent, color)
+        # max endpoint of the subtree (the node itself is the whole subtree for now)
+        self.max_high = data[1]
+
+
+class IntervalTree(RedBlackTree):
+
+    @staticmethod
+    def update_max_high(node):
+        max_high = node.data[1]
+        if node.leftChild is not None and max_high < node.leftChild.max_high:
+            max_high = node.leftChild.max_high
+        if node.rightChild is not None and max_high < node.rightChild.max_high:
+            max_high = node.rightChild.max_high
+        node.max_high = max_high
+
+    def insert_interval(self, low, high):
+        """
+        Inserts the interval [low, high]: O(logN)
+        """
+        if high < low:
+            raise ValueError(f'Invalid interval [{low}, {high}]')
+
+        data = (low, high)
+
+        if self.root is None:
+            self.root = IntervalNode(data)
+            self.violation_check(self.root)
+            return
+
+        # the new interval ends up in the subtree of every node on the path
+        node = self.root
+        while True:
+            if node.max_high < high:
+                node.max_high = high
+
+            if data < node.data:
+                if node.leftChild is None:
+                    node.leftChild = IntervalNode(data, node)
+                    node = node.leftChild
+                    break
+                node = node.leftChild
+            else:
+                if node.rightChild is None:
+                    node.rightChild = IntervalNode(data, node)
+                    node = node.rightChild
+                    break
+                node = node.rightChild
+
+        # the rotations keep the max endpoints up to date (recoloring does not change them)
+        self.violation_check(node)
+
+    def insert(self, data):
+        """
+        Inserts the interval data = (low, high), RedBlackTree.insert() would create nodes without max_high
+        """
+        low, high = data
+        self.insert_interval(low, high)
+
+    def remove_interval(self, low, high):
+        """
+        Removes the interval [low, high], returns True if it was found: O(logN)
+        """
+        return self.delete((low, high))
+
+    def splice(self, node):
+        child, parent = super().splice(node)
+
+        # the ancestors lost an interval (and the node that took the data of the successor is one of them)
+        # we fix them before delete_fixup() rotates so the rotations work with valid children
+        ancestor = parent
+        while ancestor is not None:
+            self.update_max_high(ancestor)
+            ancestor = ancestor.parent
+
+        return child, parent
+
+    def rotate_left(self, node):
+        super().rotate_left(node)
+        # the node is now the left child of its former right child
+        self.update_max_high(node)
+        self.update_max_high(node.parent)
+
+    def rotate_right(self, node):
+        super().rotate_right(node)
+        self.update_max_high(node)
+        self.update_max_high(node.parent)
+
+    def overlapping(self, a, b):
+        """
+        Yields the intervals (low, high) overlapping [a, b] sorted by low
+        """
+        stack = []
+        node = self.root
+
+        while True:
+            # a subtree with max_high < a has no interval reaching a: we do not visit it at all
+            while node is not None and not node.max_high < a:
+                stack.append(node)
+                node = node.leftChild
+
+            if not stack:
+                return
+
+            node = stack.pop()
+            low, high = node.data
+            # the intervals after this one start after b
+            if b < low:
+                return
+            if not high < a:
+                yield low, high
+
+            node = node.rightChild
+
+    def check_invariants(self):
+        """
+        Checks the red-black properties and the max endpoint of every node: O(N)
+        """
+        black_height = super().check_invariants()
+
+        for node in self.nodes_in_order():
+            expected = node.data[1]
+            for child in (node.leftChild, node.rightChild):
+                if child is not None and expected < child.max_high:
+                    expected = child.max_high
+            assert node.max_high == expected, f'invalid max endpoint at node {node.data}'
+
+        return black_height
+
+    def nodes_in_order(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.leftChild
+            node = stack.pop()
+            yield node
+            node = node.rightChild
+
+
+def randomized_overlap_check(operations=10**4, key_range=1000, seed=None):
+    """
+    Random insertions (insert_interval() and insert()), removals and overlap queries compared with a list,
+    the red-black properties and the max endpoints are checked after every 500 operations
+    """
+    import random
+
+    generator = random.Random(seed)
+    tree = IntervalTree(verbose=False)
+    expected = []
+
+    for operation in range(1, operations + 1):
+        if generator.random() < 0.6 or not expected:
+            low = generator.randrange(key_range)
+            high = low + generator.randrange(key_range // 10 + 1)
+            if generator.random() < 0.5:
+                tree.insert_interval(low, high)
+            else:
+                tree.insert((low, high))
+            expected.append((low, high))
+        else:
+            low, high = generator.choice(expected)
+            assert tree.remove_interval(low, high)
+            expected.remove((low, high))
+
+        a = generator.randrange(key_range)
+        b = a + generator.randrange(key_range // 10 + 1)
+        assert list(tree.overlapping(a, b)) == sorted(interval for interval in expected
+                                                      if interval[0] <= b and a <= interval[1])
+
+        if operation % 500 == 0:
+            tree.check_invariants()
+
+    tree.check_invariants()
+
+    print(f'{operations} operations, {len(expected)} intervals')
+
+
+def benchmark_against_list(count=10**5, queries=10**3, span=100, seed=None):
+    """
+    Overlap queries on count random time ranges: interval tree versus a linear scan of a list
+    """
+    import random
+    import time
+
+    generator = random.Random(seed)
+    intervals = []
+    for _ in range(count):
+        low = generator.randrange(count * 10)
+        intervals.append((low, low + generator.randrange(span)))
+
+    tree = IntervalTree(verbose=False)
+    for low, high in intervals:
+        tree.insert_interval(low, high)
+
+    windows = []
+    for _ in range(queries):
+        a = generator.randrange(count * 10)
+        windows.append((a, a + generator.randrange(span)))
+
+    start = time.perf_counter()
+    found = 0
+    for a, b in windows:
+        found = found + sum(1 for _ in tree.overlapping(a, b))
+    tree_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for a, b in windows:
+        [(low, high) for low, high in intervals if low <= b and a <= high]
+    list_time = time.perf_counter() - start
+
+    print(f'{count} intervals, {queries} queries, {found / queries:.1f} overlaps per query | '
+          f'tree: {tree_time / queries * 10**6:.1f} us list: {list_time / queries * 10**6:.1f} us')
+
+
+if __name__ == '__main__':
+    interval_tree = IntervalTree()
+    for low, high in [(15, 20), (10, 30), (17, 19), (5, 20), (12, 15), (30, 40)]:
+        interval_tree.insert_interval(low, high)
+
+    print(f'Overlapping [14, 16]: {list(interval_tree.overlapping(14, 16))}')
+    print(f'Overlapping [21, 23]: {list(interval_tree.overlapping(21, 23))}')
+
+    interval_tree.remove_interval(10, 30)
+    print(f'Overlapping [21, 23] after removal: {list(interval_tree.overlapping(21, 23))}')
+    print(f'Black height: {interval_tree.check_invariants()}')
+
+    # insert() takes a (low, high) pair like the other trees take their keys
+    interval_tree.insert((21, 22))
+    print(f'Overlapping [21, 23] after insert: {list(interval_tree.overlapping(21, 23))}')
+
+    randomized_overlap_check(2000)
+
+    # benchmark_against_list()
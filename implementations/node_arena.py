@@ -0,0 +1,203 @@
+# Arena storage for binary trees
+
+"""
+Every node of a tree is a python object: the object, its __dict__ and the key (a separate int object)
+add up to about 150-180 bytes per node, and following the references jumps all over the memory.
+
+Tier 1: __slots__
+    - the nodes of the BST, AVL and red-black trees define __slots__ so they do not have a __dict__
+    - saves about 40 bytes per node (no dictionary) BUT the key is still a separate python object
+
+Tier 2: arena
+    - the nodes are indices and the fields of the nodes are stored in parallel typed arrays (array module)
+        keys[i], left[i], right[i], parent[i], extra[i] (height for AVL trees, color for red-black trees)
+    - instead of references we store the index of the child node, NIL (-1) is the null reference
+    - a whole tree is 5 flat buffers: 8 + 4 + 4 + 4 + 1 = 21 bytes per node for 64 bit integer keys
+    - the nodes are never freed (append only) so arena trees are meant for bulk loads and read mostly indexes
+
+    |           | references    | arena                             |
+    |-----------|---------------|-----------------------------------|
+    | child     | node.leftChild| arena.left[node]                  |
+    | null      | None          | NIL                               |
+    | new node  | Node(data)    | arena.new_node(data) (append)     |
+"""
+
+from array import array
+
+# null reference of the arena
+NIL = -1
+
+
+class NodeArena:
+
+    def __init__(self, key_type='q'):
+        # typecode of the keys ('q' 64 bit integers, 'd' floats) or None for python objects
+        self.key_type = key_type
+        self.keys = array(key_type) if key_type is not None else []
+        self.left = array('i')
+        self.right = array('i')
+        self.parent = array('i')
+        # height (AVL tree) or color (red-black tree), both fit in a single byte
+        self.extra = array('b')
+
+    def __len__(self):
+        return len(self.left)
+
+    # amortized O(1) - returns the index of the new node
+    def new_node(self, data, parent=NIL, extra=0):
+        index = len(self.left)
+        self.keys.append(data)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.parent.append(parent)
+        self.extra.append(extra)
+        return index
+
+    def rotate_left(self, node):
+        """
+        Same as the rotations of the AVL and red-black trees with indices instead of references
+        Returns the new root of the subtree (the caller has to update the root of the tree if needed)
+        O(1) constant running time complexity
+        """
+        left = self.left
+        right = self.right
+        parent = self.parent
+
+        temp_right_node = right[node]
+        t = left[temp_right_node]
+
+        left[temp_right_node] = node
+        right[node] = t
+
+        if t != NIL:
+            parent[t] = node
+
+        temp_parent = parent[node]
+        parent[node] = temp_right_node
+        parent[temp_right_node] = temp_parent
+
+        if temp_parent != NIL:
+            if left[temp_parent] == node:
+                left[temp_parent] = temp_right_node
+            else:
+                right[temp_parent] = temp_right_node
+
+        return temp_right_node
+
+    def rotate_right(self, node):
+        """
+        O(1) constant running time complexity
+        """
+        left = self.left
+        right = self.right
+        parent = self.parent
+
+        temp_left_node = left[node]
+        t = right[temp_left_node]
+
+        right[temp_left_node] = node
+        left[node] = t
+
+        if t != NIL:
+            parent[t] = node
+
+        temp_parent = parent[node]
+        parent[node] = temp_left_node
+        parent[temp_left_node] = temp_parent
+
+        if temp_parent != NIL:
+            if left[temp_parent] == node:
+                left[temp_parent] = temp_left_node
+            else:
+                right[temp_parent] = temp_left_node
+
+        return temp_left_node
+
+    def search(self, root, data):
+        """
+        Returns the index of the node with the given data (NIL if it is not in the tree)
+        """
+        keys = self.keys
+        left = self.left
+        right = self.right
+        node = root
+
+        while node != NIL:
+            key = keys[node]
+            if data < key:
+                node = left[node]
+            elif key < data:
+                node = right[node]
+            else:
+                return node
+
+        return NIL
+
+    def in_order(self, root):
+        """
+        Yields the keys in sorted order with a stack: O(height) memory
+        """
+        keys = self.keys
+        left = self.left
+        right = self.right
+        stack = []
+        node = root
+
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = left[node]
+
+            node = stack.pop()
+            yield keys[node]
+
+            node = right[node]
+
+    def memory_usage(self):
+        """
+        Bytes used by the buffers of the arena
+        """
+        total = 0
+        for buffer in (self.left, self.right, self.parent, self.extra):
+            total = total + buffer.buffer_info()[1] * buffer.itemsize
+        if self.key_type is not None:
+            total = total + self.keys.buffer_info()[1] * self.keys.itemsize
+        return total
+
+
+def report_memory_per_key(count=10**6):
+    """
+    Builds the same tree of count random integers with __slots__ nodes (tier 1) and with an arena (tier 2)
+    and prints the bytes per key measured with tracemalloc (the int objects of the node trees are included)
+    """
+    import random
+    import tracemalloc
+
+    from avl_trees import AVLTree, ArenaAVLTree
+    from binary_search_trees import BinarySearchTree, ArenaBinarySearchTree
+    from red_black_trees import RedBlackTree, ArenaRedBlackTree
+
+    # the node based AVL and red-black trees print every rotation unless verbose is off
+    tiers = (
+        ('BinarySearchTree', BinarySearchTree, ArenaBinarySearchTree),
+        ('AVLTree', lambda: AVLTree(verbose=False), ArenaAVLTree),
+        ('RedBlackTree', lambda: RedBlackTree(verbose=False), ArenaRedBlackTree),
+    )
+
+    for name, new_node_tree, new_arena_tree in tiers:
+        results = []
+
+        for new_tree in (new_node_tree, new_arena_tree):
+            generator = random.Random(42)
+
+            tracemalloc.start()
+            tree = new_tree()
+            for _ in range(count):
+                tree.insert(generator.randrange(10**12))
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            results.append(memory / count)
+            del tree
+
+        print(f'{name:<17} | __slots__ nodes: {results[0]:6.1f} bytes per key | arena: {results[1]:5.1f} bytes per key')
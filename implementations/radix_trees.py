@@ -0,0 +1,258 @@
+# Radix trees (compressed tries)
+
+"""
+Radix tree (Patricia trie)
+    - a trie creates one node per character: keys sharing little structure (urls, identifiers)
+        produce long chains of nodes with a single child
+    - a radix tree merges the chains into a single node: the edges are labelled with strings instead of characters
+    - every node (except the root) has at least 2 children or is the end of a word, so there are at most
+        2N nodes for N words whatever the length of the words
+    - the children are stored by the first character of their label (the labels of the children of a node
+        start with different characters)
+
+Insertion
+    - we follow the labels matching the word, if the word leaves a label in the middle
+        we split the edge: a new node gets the common part of the label and the old node keeps the rest
+
+Deletion
+    - we unmark the word, remove the node if it has no children and merge the nodes with a single child
+        (and not the end of a word) with their child (the labels are concatenated)
+
+|           | Trie              | Radix tree                        |
+|-----------|-------------------|-----------------------------------|
+| Search    | O(L)              | O(L)                              | L is the length of the word
+| Nodes     | O(total length)   | O(N)                              |
+"""
+
+
+class RadixNode:
+    __slots__ = ('label', 'children', 'word_finished')
+
+    def __init__(self, label, word_finished=False):
+        self.label = label
+        self.children = {}
+        self.word_finished = word_finished
+
+
+class RadixTree:
+
+    def __init__(self):
+        self.root = RadixNode('')
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, word):
+        node = self.root
+        index = 0
+
+        while index < len(word):
+            child = node.children.get(word[index])
+
+            if child is None:
+                # no edge starts with the character: the rest of the word becomes a new leaf
+                node.children[word[index]] = RadixNode(word[index:], True)
+                self.size = self.size + 1
+                return
+
+            label = child.label
+            if word.startswith(label, index):
+                node = child
+                index = index + len(label)
+                continue
+
+            # the word leaves the label in the middle: split the edge after the common part
+            common = 1
+            while index + common < len(word) and label[common] == word[index + common]:
+                common = common + 1
+
+            middle = RadixNode(label[:common])
+            child.label = label[common:]
+            middle.children[child.label[0]] = child
+            node.children[word[index]] = middle
+
+            index = index + common
+            if index == len(word):
+                middle.word_finished = True
+            else:
+                middle.children[word[index]] = RadixNode(word[index:], True)
+            self.size = self.size + 1
+            return
+
+        if not node.word_finished:
+            node.word_finished = True
+            self.size = self.size + 1
+
+    def find_node(self, word):
+        node = self.root
+        index = 0
+
+        while index < len(word):
+            node = node.children.get(word[index])
+            if node is None or not word.startswith(node.label, index):
+                return None
+            index = index + len(node.label)
+
+        return node
+
+    def search(self, word):
+        """
+
+        :param word:
+        :return: True (word found) False (word not found)
+        """
+        node = self.find_node(word)
+        return node is not None and node.word_finished
+
+    def starts_with(self, prefix):
+        """
+        Yields the words starting with the prefix in alphabetical order
+        """
+        node = self.root
+        index = 0
+        word = ''
+
+        # the prefix may end in the middle of a label: the whole label is part of the completions
+        while index < len(prefix):
+            node = node.children.get(prefix[index])
+            if node is None:
+                return
+            rest = prefix[index:]
+            if not (node.label.startswith(rest) or rest.startswith(node.label)):
+                return
+            word = word + node.label
+            index = index + len(node.label)
+
+        stack = [(word, node)]
+        while stack:
+            word, node = stack.pop()
+            if node.word_finished:
+                yield word
+            for char in sorted(node.children, reverse=True):
+                child = node.children[char]
+                stack.append((word + child.label, child))
+
+    def delete(self, word):
+        """
+        Removes the word, returns True if it was found
+        """
+        parent = None
+        node = self.root
+        index = 0
+
+        while index < len(word):
+            parent = node
+            node = node.children.get(word[index])
+            if node is None or not word.startswith(node.label, index):
+                return False
+            index = index + len(node.label)
+
+        if not node.word_finished:
+            return False
+
+        node.word_finished = False
+        self.size = self.size - 1
+
+        if node is self.root:
+            return True
+
+        if not node.children:
+            # the leaf is not needed anymore, its parent may be left with a single child
+            del parent.children[node.label[0]]
+            if parent is not self.root and not parent.word_finished and len(parent.children) == 1:
+                self.merge_with_child(parent)
+        elif len(node.children) == 1:
+            self.merge_with_child(node)
+
+        return True
+
+    @staticmethod
+    def merge_with_child(node):
+        # the node keeps its place in the parent (the first character of the label does not change)
+        (child,) = node.children.values()
+        node.label = node.label + child.label
+        node.children = child.children
+        node.word_finished = child.word_finished
+
+    def count_nodes(self):
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count = count + 1
+            stack.extend(node.children.values())
+        return count
+
+
+def count_trie_nodes(trie):
+    count = 0
+    stack = [trie.root]
+    while stack:
+        node = stack.pop()
+        count = count + 1
+        stack.extend(node.children.values())
+    return count
+
+
+def compare_with_trie(key_sets=None, lookups=10**5):
+    """
+    Node count, memory (tracemalloc) and lookup time of the Trie and the radix tree
+    By default on two real key sets: the identifiers and the file paths of the python standard library
+    """
+    import os
+    import random
+    import time
+    import tracemalloc
+
+    from tenary_search_trees import Trie, load_vocabulary
+
+    if key_sets is None:
+        library = os.path.dirname(os.__file__)
+        paths = [os.path.join(directory, file_name)
+                 for directory, _, file_names in os.walk(library) for file_name in file_names]
+        key_sets = {'identifiers': load_vocabulary(), 'file paths': paths}
+
+    for name, keys in key_sets.items():
+        keys = list(set(keys))
+        queries = [random.choice(keys) for _ in range(lookups)]
+        print(f'{name}: {len(keys)} keys, {sum(map(len, keys)) / len(keys):.1f} characters on average')
+
+        results = {}
+        for structure_class, count in ((Trie, count_trie_nodes), (RadixTree, RadixTree.count_nodes)):
+            tracemalloc.start()
+            structure = structure_class()
+            for key in keys:
+                structure.insert(key)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            search = structure.search
+            start = time.perf_counter()
+            for key in queries:
+                search(key)
+            lookup_time = (time.perf_counter() - start) / lookups
+
+            results[structure_class.__name__] = (count(structure), memory, lookup_time)
+            print(f'    {structure_class.__name__:<10} | nodes: {count(structure):9} | '
+                  f'memory: {memory / 2**20:7.1f} MB | lookup: {lookup_time * 10**9:6.0f} ns')
+
+        trie_nodes, trie_memory, trie_time = results['Trie']
+        radix_nodes, radix_memory, radix_time = results['RadixTree']
+        print(f'    {trie_nodes / radix_nodes:.1f}x fewer nodes, {trie_memory / radix_memory:.1f}x less memory, '
+              f'{trie_time / radix_time:.1f}x faster lookups')
+
+
+if __name__ == '__main__':
+    radix_tree = RadixTree()
+    for word in ['romane', 'romanus', 'romulus', 'rubens', 'ruber', 'rubicon', 'rubicundus']:
+        radix_tree.insert(word)
+
+    print(f'Nodes: {radix_tree.count_nodes()} search rubens: {radix_tree.search("rubens")} '
+          f'search rub: {radix_tree.search("rub")}')
+    print(f'Starts with rom: {list(radix_tree.starts_with("rom"))}')
+
+    radix_tree.delete('romulus')
+    print(f'After deletion: {list(radix_tree.starts_with(""))} nodes: {radix_tree.count_nodes()}')
+
+    # compare_with_trie()
@@ -40,12 +40,18 @@ Red black property violations:
 """
 
 
+from node_arena import NodeArena, NIL
+from tree_snapshots import save_sorted, open_mmap
+
+
 class Color:
     RED = 1
     BLACK = 2
 
 
 class Node:
+    # no __dict__ for the nodes: the attributes are stored in fixed slots (less memory per node)
+    __slots__ = ('data', 'color', 'parent', 'leftChild', 'rightChild')
 
     def __init__(self, data, parent=None, color=Color.RED):
         self.data = data
@@ -57,8 +63,12 @@ class Node:
 
 class RedBlackTree:
 
-    def __init__(self):
+    def __init__(self, verbose=True):
         self.root = None
+        # number of rotations since the tree was created (benchmarks)
+        self.rotations = 0
+        # print the rotations and recoloring (off for benchmarks and big trees)
+        self.verbose = verbose
 
         def traverse(self):
             if self.root is not None:
@@ -113,6 +123,341 @@ class RedBlackTree:
                 node.rightChild = Node(data, node)
                 self.violation_check(node.rightChild)
 
+    def search(self, data):
+        """
+        Returns the node with the given data (None if it is not in the tree)
+        O(logN) as the height of the tree is at most 2logN
+        """
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                node = node.leftChild
+            elif node.data < data:
+                node = node.rightChild
+            else:
+                return node
+
+        return None
+
+    def __contains__(self, data):
+        return self.search(data) is not None
+
+    @staticmethod
+    def get_min(node):
+        while node.leftChild is not None:
+            node = node.leftChild
+        return node
+
+    @staticmethod
+    def get_max(node):
+        while node.rightChild is not None:
+            node = node.rightChild
+        return node
+
+    def get_min_value(self):
+        if self.root:
+            return self.get_min(self.root).data
+
+    def get_max_value(self):
+        if self.root:
+            return self.get_max(self.root).data
+
+    def floor(self, data):
+        """
+        Largest item smaller than or equal to data (None if there is no such item): O(logN)
+        """
+        result = None
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                node = node.leftChild
+            else:
+                # the node is a candidate but there may be a larger one in the right subtree
+                result = node.data
+                node = node.rightChild
+
+        return result
+
+    def ceiling(self, data):
+        """
+        Smallest item greater than or equal to data (None if there is no such item): O(logN)
+        """
+        result = None
+        node = self.root
+
+        while node is not None:
+            if node.data < data:
+                node = node.rightChild
+            else:
+                result = node.data
+                node = node.leftChild
+
+        return result
+
+    def successor(self, data):
+        """
+        Smallest item strictly greater than data: O(logN)
+        """
+        result = None
+        node = self.root
+
+        while node is not None:
+            if data < node.data:
+                result = node.data
+                node = node.leftChild
+            else:
+                node = node.rightChild
+
+        return result
+
+    def predecessor(self, data):
+        """
+        Largest item strictly smaller than data: O(logN)
+        """
+        result = None
+        node = self.root
+
+        while node is not None:
+            if node.data < data:
+                result = node.data
+                node = node.rightChild
+            else:
+                node = node.leftChild
+
+        return result
+
+    def __iter__(self):
+        return self.items()
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the items with lo <= item <= hi in sorted order (None means no limit), reverse=True yields them in
+        descending order
+        O(logN) to seek to lo, the stack holds at most one path of the tree: memory is O(height)
+        """
+        stack = []
+        node = self.root
+
+        if not reverse:
+            # seek: the nodes where we go left are the items >= lo, they are visited after their left subtree
+            while node is not None:
+                if lo is not None and node.data < lo:
+                    node = node.rightChild
+                else:
+                    stack.append(node)
+                    node = node.leftChild
+
+            while stack:
+                node = stack.pop()
+                if hi is not None and hi < node.data:
+                    return
+                yield node.data
+
+                # the successor is the left most node of the right subtree
+                node = node.rightChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.leftChild
+        else:
+            # mirror image: seek to hi and walk to the left
+            while node is not None:
+                if hi is not None and hi < node.data:
+                    node = node.leftChild
+                else:
+                    stack.append(node)
+                    node = node.rightChild
+
+            while stack:
+                node = stack.pop()
+                if lo is not None and node.data < lo:
+                    return
+                yield node.data
+
+                node = node.leftChild
+                while node is not None:
+                    stack.append(node)
+                    node = node.rightChild
+
+    def save(self, path, key_type='q'):
+        """
+        Writes the items into a snapshot file (sorted keys in Eytzinger order, see tree_snapshots)
+        key_type is the typecode of the keys: 'q' for 64 bit integers, 'd' for floats
+        the duplicate items of the tree are saved as well
+        """
+        save_sorted(path, self.items(), key_type)
+
+    @staticmethod
+    def open_mmap(path):
+        """
+        Memory maps a snapshot written by save(): search, floor, ceiling and items are answered from the file
+        without building the tree again
+        """
+        return open_mmap(path)
+
+    def delete(self, data):
+        """
+        Removes the item, returns True if it was found
+        1) a node with two children: we copy the data of the successor (lowest item in the right subtree)
+            and remove the successor instead, it has at most one child
+        2) the child (or None) takes the place of the removed node
+        3) removing a red node does not change the number of black nodes on any path
+            removing a black node with a red child: we recolor the child to black
+            removing a black node with a black (None) child: the path is missing a black node ("double black")
+            so we have to fix the tree with delete_fixup()
+        O(logN) and at most 3 rotations
+        """
+        node = self.search(data)
+        if node is None:
+            return False
+
+        if node.leftChild is not None and node.rightChild is not None:
+            successor = self.get_min(node.rightChild)
+            node.data = successor.data
+            node = successor
+
+        child, parent = self.splice(node)
+
+        if node.color == Color.BLACK:
+            if child is not None and child.color == Color.RED:
+                child.color = Color.BLACK
+            else:
+                self.delete_fixup(child, parent)
+
+        return True
+
+    def splice(self, node):
+        """
+        Replaces the node (it has at most one child) with its child, returns the child and the parent
+        """
+        child = node.leftChild if node.leftChild is not None else node.rightChild
+        parent = node.parent
+
+        if child is not None:
+            child.parent = parent
+
+        if parent is None:
+            self.root = child
+        elif parent.leftChild is node:
+            parent.leftChild = child
+        else:
+            parent.rightChild = child
+
+        return child, parent
+
+    @staticmethod
+    def is_black(node):
+        # the None leaves are black
+        return node is None or node.color == Color.BLACK
+
+    def delete_fixup(self, node, parent):
+        """
+        node has an extra black (it can be None so we keep track of the parent as well)
+        We move the extra black up the tree until we reach a red node (we recolor it black) or the root
+            case 1: sibling is red - rotate on the parent so the sibling is black (then case 2, 3 or 4)
+            case 2: sibling is black with two black children - recolor the sibling red, the parent gets the extra black
+            case 3: sibling is black, its far child is black and near child is red - rotate on the sibling (then case 4)
+            case 4: sibling is black with a red far child - rotate on the parent and recolor, we are done
+        """
+        while node is not self.root and self.is_black(node):
+            if node is parent.leftChild:
+                sibling = parent.rightChild
+
+                if sibling.color == Color.RED:
+                    # case 1
+                    sibling.color = Color.BLACK
+                    parent.color = Color.RED
+                    self.rotate_left(parent)
+                    sibling = parent.rightChild
+
+                if self.is_black(sibling.leftChild) and self.is_black(sibling.rightChild):
+                    # case 2
+                    sibling.color = Color.RED
+                    node = parent
+                    parent = node.parent
+                else:
+                    if self.is_black(sibling.rightChild):
+                        # case 3
+                        sibling.leftChild.color = Color.BLACK
+                        sibling.color = Color.RED
+                        self.rotate_right(sibling)
+                        sibling = parent.rightChild
+
+                    # case 4
+                    sibling.color = parent.color
+                    parent.color = Color.BLACK
+                    sibling.rightChild.color = Color.BLACK
+                    self.rotate_left(parent)
+                    node = self.root
+
+            # symmetric solution for the above
+            else:
+                sibling = parent.leftChild
+
+                if sibling.color == Color.RED:
+                    # case 1
+                    sibling.color = Color.BLACK
+                    parent.color = Color.RED
+                    self.rotate_right(parent)
+                    sibling = parent.leftChild
+
+                if self.is_black(sibling.leftChild) and self.is_black(sibling.rightChild):
+                    # case 2
+                    sibling.color = Color.RED
+                    node = parent
+                    parent = node.parent
+                else:
+                    if self.is_black(sibling.leftChild):
+                        # case 3
+                        sibling.rightChild.color = Color.BLACK
+                        sibling.color = Color.RED
+                        self.rotate_left(sibling)
+                        sibling = parent.leftChild
+
+                    # case 4
+                    sibling.color = parent.color
+                    parent.color = Color.BLACK
+                    sibling.leftChild.color = Color.BLACK
+                    self.rotate_right(parent)
+                    node = self.root
+
+        if node is not None:
+            node.color = Color.BLACK
+
+    def check_invariants(self):
+        """
+        Returns the black height of the tree and fails (AssertionError) if a red-black property is violated
+            - the root is black
+            - a red node has no red children
+            - every path from a node to the leaves has the same number of black nodes
+            - the items are in sorted order and the parent references are valid
+        O(N)
+        """
+        assert self.is_black(self.root), 'the root node has to be black'
+        assert self.root is None or self.root.parent is None
+
+        return self.check_subtree(self.root, None, None)
+
+    def check_subtree(self, node, low, high):
+        if node is None:
+            return 1
+
+        assert low is None or not node.data < low, 'items are not in sorted order'
+        assert high is None or not high < node.data, 'items are not in sorted order'
+
+        for child in (node.leftChild, node.rightChild):
+            if child is not None:
+                assert child.parent is node, 'invalid parent reference'
+                if node.color == Color.RED:
+                    assert child.color == Color.BLACK, f'red node {node.data} has a red child'
+
+        left_black_height = self.check_subtree(node.leftChild, low, node.data)
+        right_black_height = self.check_subtree(node.rightChild, node.data, high)
+        assert left_black_height == right_black_height, f'black height differs below node {node.data}'
+
+        return left_black_height + (1 if node.color == Color.BLACK else 0)
+
     def violation_check(self, node):
 
         parent_node = None
@@ -132,10 +477,13 @@ class RedBlackTree:
 
                 if uncle and uncle.color == Color.RED:
                     # case 1 and case 4: we recolor the nodes
-                    print(f'Recoloring node {grandparent_node.data} to RED')
+                    if self.verbose:
+                        print(f'Recoloring node {grandparent_node.data} to RED')
+                        print(f'Recoloring node {parent_node.data} to BLACK')
+                        print(f'Recoloring node {uncle.data} to BLACK')
                     grandparent_node.color = Color.RED
-                    print(f'Recoloring node {parent_node.data} to BLACK')
                     parent_node.color = Color.BLACK
+                    uncle.color = Color.BLACK
                     node = grandparent_node  # so we can check the other parts of the tree for violations
                 else:
                     # case 2: uncle node is black and node is right child
@@ -147,8 +495,9 @@ class RedBlackTree:
                     # case 3: uncle is black and node is left child
                     parent_node.color = Color.BLACK
                     grandparent_node.color = Color.RED
-                    print(f'Recoloring node {parent_node.data} to RED')
-                    print(f'Recoloring node {grandparent_node.data} to BLACK')
+                    if self.verbose:
+                        print(f'Recoloring node {parent_node.data} to RED')
+                        print(f'Recoloring node {grandparent_node.data} to BLACK')
                     self.rotate_right(grandparent_node)
 
             # symmetric solution for the above
@@ -157,10 +506,13 @@ class RedBlackTree:
 
                 if uncle and uncle.color == Color.RED:
                     # case 1 and case 4: we recolor the nodes
-                    print(f'Recoloring node {grandparent_node.data} to RED')
+                    if self.verbose:
+                        print(f'Recoloring node {grandparent_node.data} to RED')
+                        print(f'Recoloring node {parent_node.data} to BLACK')
+                        print(f'Recoloring node {uncle.data} to BLACK')
                     grandparent_node.color = Color.RED
-                    print(f'Recoloring node {parent_node.data} to BLACK')
                     parent_node.color = Color.BLACK
+                    uncle.color = Color.BLACK
                     node = grandparent_node  # so we can check the other parts of the tree for violations
                 else:
                     # case 2: uncle node is black and node is left child
@@ -172,19 +524,23 @@ class RedBlackTree:
                     # case 3: uncle is black and node is right child
                     parent_node.color = Color.BLACK
                     grandparent_node.color = Color.RED
-                    print(f'Recoloring node {parent_node.data} to RED')
-                    print(f'Recoloring node {grandparent_node.data} to BLACK')
+                    if self.verbose:
+                        print(f'Recoloring node {parent_node.data} to RED')
+                        print(f'Recoloring node {grandparent_node.data} to BLACK')
                     self.rotate_left(grandparent_node)
 
         if self.root.color == Color.RED:
-            print(f'Recoloring root node to RED')
+            if self.verbose:
+                print(f'Recoloring root node to RED')
             self.root.color = Color.BLACK
 
     def rotate_right(self, node):
         """
         O(1) constant running time complexity
         """
-        print(f'Rotating to the right on node {node.data}')
+        if self.verbose:
+            print(f'Rotating to the right on node {node.data}')
+        self.rotations = self.rotations + 1
 
         # using temporary values we create a temporary left node that takes updated references for it's child nodes
         temp_left_node = node.leftChild
@@ -215,7 +571,9 @@ class RedBlackTree:
         """
         O(1) constant running time complexity
         """
-        print(f'Rotating to the left on node {node.data}')
+        if self.verbose:
+            print(f'Rotating to the left on node {node.data}')
+        self.rotations = self.rotations + 1
 
         # using temporary values we create a temporary right node that takes updated references for it's child nodes
         temp_right_node = node.rightChild
@@ -243,15 +601,198 @@ class RedBlackTree:
             self.root = temp_right_node
 
 
-rbt = RedBlackTree()
-rbt.insert(32)
-rbt.insert(10)
-rbt.insert(55)
-rbt.insert(1)
-rbt.insert(19)
-rbt.insert(79)
-rbt.insert(16)
-rbt.insert(23)
-rbt.insert(12)
+def randomized_invariant_check(operations=10**5, key_range=10**4, seed=None):
+    """
+    Runs random insertions and deletions and checks the red-black properties (black height and
+    no red node with a red child) and compares the items with a sorted list
+    The full check is O(N) so we run it after every 1000 operations and at the end
+    """
+    import bisect
+    import random
+
+    generator = random.Random(seed)
+    tree = RedBlackTree(verbose=False)
+    expected = []
+
+    for operation in range(1, operations + 1):
+        key = generator.randrange(key_range)
+
+        if generator.random() < 0.6:
+            tree.insert(key)
+            bisect.insort(expected, key)
+        else:
+            index = bisect.bisect_left(expected, key)
+            found = index < len(expected) and expected[index] == key
+            assert tree.delete(key) == found
+            if found:
+                del expected[index]
+
+        probe = generator.randrange(key_range)
+        index = bisect.bisect_right(expected, probe)
+        assert tree.floor(probe) == (expected[index - 1] if index > 0 else None)
+        assert tree.successor(probe) == (expected[index] if index < len(expected) else None)
+
+        if operation % 1000 == 0:
+            tree.check_invariants()
+
+    black_height = tree.check_invariants()
+
+    # in-order traversal with a stack to compare every item
+    items = []
+    stack = []
+    node = tree.root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.leftChild
+        node = stack.pop()
+        items.append(node.data)
+        node = node.rightChild
+    assert items == expected
+
+    print(f'{operations} operations, {len(expected)} items, black height: {black_height}')
+
+
+class ArenaRedBlackTree:
+    """
+    Red-black tree stored in a NodeArena: the color of the nodes is stored in the extra array
+    Append only: insert, search and in-order iteration
+    """
+
+    def __init__(self, key_type='q'):
+        self.arena = NodeArena(key_type)
+        self.root = NIL
+
+    def __len__(self):
+        return len(self.arena)
+
+    def insert(self, data):
+        arena = self.arena
+
+        if self.root == NIL:
+            self.root = arena.new_node(data, NIL, Color.BLACK)
+            return
+
+        keys = arena.keys
+        left = arena.left
+        right = arena.right
+        node = self.root
+
+        while True:
+            if data < keys[node]:
+                if left[node] == NIL:
+                    left[node] = arena.new_node(data, node, Color.RED)
+                    node = left[node]
+                    break
+                node = left[node]
+            else:
+                if right[node] == NIL:
+                    right[node] = arena.new_node(data, node, Color.RED)
+                    node = right[node]
+                    break
+                node = right[node]
+
+        self.violation_check(node)
 
-rbt.traverse()
\ No newline at end of file
+    def violation_check(self, node):
+        """
+        Same cases as RedBlackTree.violation_check()
+        """
+        arena = self.arena
+        left = arena.left
+        right = arena.right
+        parent = arena.parent
+        color = arena.extra
+
+        while node != self.root and color[parent[node]] == Color.RED:
+            parent_node = parent[node]
+            # the parent is red so it is not the root: the grandparent exists
+            grandparent_node = parent[parent_node]
+
+            if parent_node == left[grandparent_node]:
+                uncle = right[grandparent_node]
+
+                if uncle != NIL and color[uncle] == Color.RED:
+                    # case 1 and case 4: we recolor the nodes
+                    color[grandparent_node] = Color.RED
+                    color[parent_node] = Color.BLACK
+                    color[uncle] = Color.BLACK
+                    node = grandparent_node
+                else:
+                    # case 2: uncle node is black and node is right child
+                    if node == right[parent_node]:
+                        self.rotate_left(parent_node)
+                        node = parent_node
+                        parent_node = parent[node]
+
+                    # case 3: uncle is black and node is left child
+                    color[parent_node] = Color.BLACK
+                    color[grandparent_node] = Color.RED
+                    self.rotate_right(grandparent_node)
+
+            # symmetric solution for the above
+            else:
+                uncle = left[grandparent_node]
+
+                if uncle != NIL and color[uncle] == Color.RED:
+                    color[grandparent_node] = Color.RED
+                    color[parent_node] = Color.BLACK
+                    color[uncle] = Color.BLACK
+                    node = grandparent_node
+                else:
+                    if node == left[parent_node]:
+                        self.rotate_right(parent_node)
+                        node = parent_node
+                        parent_node = parent[node]
+
+                    color[parent_node] = Color.BLACK
+                    color[grandparent_node] = Color.RED
+                    self.rotate_left(grandparent_node)
+
+        color[self.root] = Color.BLACK
+
+    def rotate_left(self, node):
+        new_root = self.arena.rotate_left(node)
+        if node == self.root:
+            self.root = new_root
+
+    def rotate_right(self, node):
+        new_root = self.arena.rotate_right(node)
+        if node == self.root:
+            self.root = new_root
+
+    def __contains__(self, data):
+        return self.arena.search(self.root, data) != NIL
+
+    def __iter__(self):
+        return self.arena.in_order(self.root)
+
+
+if __name__ == '__main__':
+    rbt = RedBlackTree()
+    rbt.insert(32)
+    rbt.insert(10)
+    rbt.insert(55)
+    rbt.insert(1)
+    rbt.insert(19)
+    rbt.insert(79)
+    rbt.insert(16)
+    rbt.insert(23)
+    rbt.insert(12)
+
+    rbt.traverse()
+
+    rbt.delete(19)
+    rbt.delete(32)
+    print(f'Contains 19: {19 in rbt} min: {rbt.get_min_value()} max: {rbt.get_max_value()}')
+    print(f'Floor 20: {rbt.floor(20)} ceiling 20: {rbt.ceiling(20)} '
+          f'successor 23: {rbt.successor(23)} predecessor 23: {rbt.predecessor(23)}')
+    print(f'Black height: {rbt.check_invariants()}')
+    print(f'Items 10 - 50: {list(rbt.items(10, 50))} descending from 20: {list(rbt.items(hi=20, reverse=True))}')
+
+    # randomized_invariant_check()
+
+    arena_rbt = ArenaRedBlackTree()
+    for key in [32, 10, 55, 1, 19, 79, 16, 23, 12]:
+        arena_rbt.insert(key)
+    print(f'Arena red-black tree: {list(arena_rbt)} contains 23: {23 in arena_rbt}')
@@ -15,9 +15,47 @@ Ternary Search Trees
 
 Tries:
     - node can have as many children as the size of the alphabet (ie in English 26)
+    - every node has its own dictionary of children: a few hundred bytes per node even with a single child
+    - counter: number of insertions that passed through the node, frequency: number of insertions of the word
+        ending at the node, max_frequency: highest frequency of a word in the subtree of the node
+    - freeze(): the trie is minimised into a DAWG in flat arrays (see dawgs.py)
+    - top k completions: best first search with a heap ordered by max_frequency, the bound is exact (the subtree
+        contains a word with that frequency) so we only follow the paths to the k most frequent words
+        instead of walking the whole subtree of the prefix
+    - fuzzy search: one row of the Levenshtein (edit distance) table per node, computed from the row of the parent
+        the words below a node are at least min(row) edits away so we skip the subtree if min(row) > max_distance
 
+TernarySearchTree:
+    - every node stores one character and exactly 3 references (lo, eq, hi) in __slots__ (no dictionary)
+    - searching: if the character is smaller go lo, if it is greater go hi, if it is equal go eq (next character)
+    - the lo and hi links form a binary search tree of the characters at the same position of the words
+    - inserting sorted words makes these binary search trees linked lists, so for a sorted word list
+        we insert the middle word first and then the middle words of the two halves (balanced bulk build)
+
+|           | Trie              | Ternary search tree               |
+|-----------|-------------------|-----------------------------------|
+| Search    | O(L)              | O(L + logN) (balanced)            | L is the length of the word
+| Memory    | dict per node     | 3 references per node             |
 """
 
+import heapq
+import re
+
+from dawgs import build_dawg
+
+
+def next_levenshtein_row(word, row, char):
+    """
+    Edit distances between the prefixes of word and (the prefix of the previous row) + char
+    row[i] is the distance to word[:i]: O(len(word))
+    """
+    new_row = [row[0] + 1]
+    for index in range(1, len(word) + 1):
+        new_row.append(min(new_row[index - 1] + 1,  # insertion
+                           row[index] + 1,  # deletion
+                           row[index - 1] + (word[index - 1] != char)))  # substitution (or match)
+    return new_row
+
 
 class Node:
 
@@ -26,6 +64,8 @@ class Node:
         self.children = {}
         self.word_finished = False
         self.counter = 0
+        self.frequency = 0
+        self.max_frequency = 0
 
 
 class Trie:
@@ -45,6 +85,17 @@ class Trie:
                 current = new_node
                 current.counter += 1
         current.word_finished = True
+        current.frequency += 1
+
+        # the word may be the most frequent word in the subtrees on its path now
+        frequency = current.frequency
+        current = self.root
+        if current.max_frequency < frequency:
+            current.max_frequency = frequency
+        for char in word:
+            current = current.children[char]
+            if current.max_frequency < frequency:
+                current.max_frequency = frequency
 
     def search(self, word):
         """
@@ -64,20 +115,334 @@ class Trie:
             return True
         return False
 
+    def freeze(self):
+        """
+        Minimises the trie into a read only DAWG (common suffixes are shared) stored in flat arrays,
+        Dawg.save() writes it into a file that dawgs.open_mmap() can memory map
+        """
+        return build_dawg(self.root)
+
+    def find_node(self, prefix):
+        current = self.root
+        for char in prefix:
+            current = current.children.get(char)
+            if current is None:
+                return None
+        return current
+
+    def starts_with(self, prefix):
+        """
+        Yields the words starting with the prefix in alphabetical order (lazy: we only walk the part
+        of the subtree we need for the words that are consumed)
+        """
+        node = self.find_node(prefix)
+        if node is None:
+            return
+
+        # depth first with a stack instead of recursion, the children are pushed in reverse order
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            if node.word_finished:
+                yield word
+            for char in sorted(node.children, reverse=True):
+                stack.append((word + char, node.children[char]))
+
+    def top_k_completions(self, prefix, k):
+        """
+        The k most frequent words starting with the prefix as (word, frequency) pairs
+        (equally frequent words in alphabetical order)
+        O(k * L * alphabet * logk) for words of length L instead of the size of the subtree
+        """
+        node = self.find_node(prefix)
+        if node is None or k <= 0:
+            return []
+
+        # (-frequency, word, 0, None) for a word and (-max_frequency, prefix, 1, node) for a subtree:
+        # a subtree is expanded before any word that is less frequent than its best word
+        heap = [(-node.max_frequency, prefix, 1, node)]
+        completions = []
+
+        while heap and len(completions) < k:
+            frequency, word, is_subtree, node = heapq.heappop(heap)
+
+            if not is_subtree:
+                completions.append((word, -frequency))
+                continue
+
+            if node.word_finished:
+                heapq.heappush(heap, (-node.frequency, word, 0, None))
+            for char, child in node.children.items():
+                heapq.heappush(heap, (-child.max_frequency, word + char, 1, child))
+
+        return completions
+
+    def search_fuzzy(self, word, max_distance):
+        """
+        The words within max_distance edits (insertion, deletion, substitution) of the word
+        as (word, distance) pairs sorted by distance
+        Every visited node costs O(len(word)) and the subtrees too far away are never visited
+        """
+        first_row = list(range(len(word) + 1))
+        matches = []
+        if self.root.word_finished and first_row[-1] <= max_distance:
+            matches.append(('', first_row[-1]))
+
+        stack = [(self.root, '', first_row)]
+        while stack:
+            node, prefix, row = stack.pop()
+
+            for char, child in node.children.items():
+                new_row = next_levenshtein_row(word, row, char)
+                if child.word_finished and new_row[-1] <= max_distance:
+                    matches.append((prefix + char, new_row[-1]))
+                # every word below the child needs at least min(new_row) edits
+                if min(new_row) <= max_distance:
+                    stack.append((child, prefix + char, new_row))
+
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+class TernaryNode:
+    # no __dict__: the character, the three links and the flag are stored in fixed slots
+    __slots__ = ('char', 'lo', 'eq', 'hi', 'word_finished')
+
+    def __init__(self, char):
+        self.char = char
+        self.lo = None
+        self.eq = None
+        self.hi = None
+        self.word_finished = False
+
+
+class TernarySearchTree:
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+        # the empty word has no node (every node stores a character)
+        self.empty_word = False
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_sorted(cls, words):
+        """
+        Balanced bulk build from a sorted list of words: the middle word of every range is inserted
+        before the two halves, so the lo/hi binary search trees are balanced
+        """
+        tree = cls()
+        words = list(words)
+        # a stack of (low, high) ranges instead of recursion
+        ranges = [(0, len(words) - 1)]
+
+        while ranges:
+            low, high = ranges.pop()
+            if high < low:
+                continue
+            middle = (low + high) // 2
+            tree.insert(words[middle])
+            ranges.append((middle + 1, high))
+            ranges.append((low, middle - 1))
+
+        return tree
+
+    def insert(self, word):
+        """
+        O(L + height of the lo/hi trees)
+        """
+        if not word:
+            if not self.empty_word:
+                self.empty_word = True
+                self.size = self.size + 1
+            return
+
+        if self.root is None:
+            self.root = TernaryNode(word[0])
+
+        node = self.root
+        index = 0
+
+        while True:
+            char = word[index]
+
+            if char < node.char:
+                if node.lo is None:
+                    node.lo = TernaryNode(char)
+                node = node.lo
+            elif node.char < char:
+                if node.hi is None:
+                    node.hi = TernaryNode(char)
+                node = node.hi
+            else:
+                index = index + 1
+                if index == len(word):
+                    if not node.word_finished:
+                        node.word_finished = True
+                        self.size = self.size + 1
+                    return
+                if node.eq is None:
+                    node.eq = TernaryNode(word[index])
+                node = node.eq
+
+    def search(self, word):
+        """
+
+        :param word:
+        :return: True (word found) False (word not found)
+        """
+        if not word:
+            return self.empty_word
+
+        node = self.root
+        index = 0
+        last = len(word) - 1
+
+        while node is not None:
+            char = word[index]
+
+            if char < node.char:
+                node = node.lo
+            elif node.char < char:
+                node = node.hi
+            elif index == last:
+                return node.word_finished
+            else:
+                index = index + 1
+                node = node.eq
+
+        return False
+
+    def search_fuzzy(self, word, max_distance):
+        """
+        The words within max_distance edits of the word as (word, distance) pairs sorted by distance
+        The row of a node belongs to the prefix before its character: the lo and hi nodes (other characters
+        at the same position) get the same row, the eq node gets the row extended with the character
+        """
+        first_row = list(range(len(word) + 1))
+        matches = []
+        if self.empty_word and first_row[-1] <= max_distance:
+            matches.append(('', first_row[-1]))
+
+        stack = [(self.root, '', first_row)] if self.root is not None else []
+        while stack:
+            node, prefix, row = stack.pop()
+
+            if node.lo is not None:
+                stack.append((node.lo, prefix, row))
+            if node.hi is not None:
+                stack.append((node.hi, prefix, row))
+
+            new_row = next_levenshtein_row(word, row, node.char)
+            if node.word_finished and new_row[-1] <= max_distance:
+                matches.append((prefix + node.char, new_row[-1]))
+            if node.eq is not None and min(new_row) <= max_distance:
+                stack.append((node.eq, prefix + node.char, new_row))
+
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+def load_vocabulary(path=None, limit=None):
+    """
+    Words of the file (one word per line) or, without a file, the distinct identifiers of the python standard
+    library sources (a real vocabulary that is available everywhere)
+    """
+    if path is not None:
+        with open(path, encoding='utf-8') as file:
+            words = sorted({line.strip() for line in file if line.strip()})
+        return words[:limit] if limit is not None else words
+
+    import os
+
+    identifier = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+    words = set()
+
+    for directory, _, file_names in os.walk(os.path.dirname(os.__file__)):
+        for file_name in file_names:
+            if file_name.endswith('.py'):
+                with open(os.path.join(directory, file_name), encoding='utf-8', errors='ignore') as file:
+                    words.update(identifier.findall(file.read()))
+        if limit is not None and len(words) >= limit:
+            break
+
+    words = sorted(words)
+    return words[:limit] if limit is not None else words
+
+
+def benchmark_against_trie(words=None, lookups=10**5):
+    """
+    Memory (tracemalloc) and lookup time of the dict based Trie, the ternary search tree with words inserted
+    in random order and the balanced bulk build
+    """
+    import random
+    import time
+    import tracemalloc
+
+    if words is None:
+        words = load_vocabulary()
+    words = sorted(words)
+    shuffled = random.sample(words, len(words))
+
+    # half of the lookups are misses (the words with a changed last character)
+    queries = [random.choice(words) for _ in range(lookups)]
+    queries = [word if index % 2 else word[:-1] + '#' for index, word in enumerate(queries)]
+
+    def build_trie():
+        trie = Trie()
+        for word in shuffled:
+            trie.insert(word)
+        return trie
+
+    def build_tst():
+        tst = TernarySearchTree()
+        for word in shuffled:
+            tst.insert(word)
+        return tst
+
+    print(f'{len(words)} words, {lookups} lookups')
+
+    for name, build in (('Trie', build_trie), ('TernarySearchTree', build_tst),
+                        ('TernarySearchTree.from_sorted', lambda: TernarySearchTree.from_sorted(words))):
+        tracemalloc.start()
+        structure = build()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        search = structure.search
+        start = time.perf_counter()
+        for word in queries:
+            search(word)
+        lookup_time = time.perf_counter() - start
+
+        print(f'{name:<30} | memory: {memory / 2**20:7.1f} MB ({memory / len(words):5.0f} bytes per word) | '
+              f'lookup: {lookup_time / lookups * 10**9:5.0f} ns')
+
+
+if __name__ == '__main__':
+    tree = Trie()
 
-tree = Trie()
+    tree.insert('bat')
+    tree.insert('horse')
+    tree.insert('zebra')
+    tree.insert('cat')
+    tree.insert('caterpillar')
+    tree.insert('mouse')
+    tree.insert('rat')
 
-tree.insert('bat')
-tree.insert('horse')
-tree.insert('zebra')
-tree.insert('cat')
-tree.insert('caterpillar')
-tree.insert('mouse')
-tree.insert('rat')
+    print(tree.search('bat'))
+    print(tree.search('dog'))
+    print(tree.search('batter'))
+    print(tree.search('caterpillar'))
 
-print(tree.search('bat'))
-print(tree.search('dog'))
-print(tree.search('batter'))
-print(tree.search('caterpillar'))
+    for word in ['cat', 'cat', 'cat', 'caterpillar', 'car', 'car', 'cart']:
+        tree.insert(word)
+    print(f'Starts with ca: {list(tree.starts_with("ca"))}')
+    print(f'Top 2 completions of ca: {tree.top_k_completions("ca", 2)}')
+    print(f'Did you mean (cst): {tree.search_fuzzy("cst", 1)}')
 
+    tst = TernarySearchTree.from_sorted(['bat', 'cat', 'caterpillar', 'horse', 'mouse', 'rat', 'zebra'])
+    print(f'Ternary search tree: {tst.search("cat")} {tst.search("cats")} {tst.search("caterpillar")}')
+    print(f'Did you mean (hose): {tst.search_fuzzy("hose", 1)}')
 
+    # benchmark_against_trie()
@@ -0,0 +1,265 @@
+# Benchmarks of the ordered trees
+
+"""
+Which tree should we use? It depends on the workload:
+    - BinarySearchTree: no balancing work at all BUT sorted (or reverse sorted) keys make it a linked list: O(N)
+    - AVLTree: strictly balanced (lower tree, faster search) BUT more rotations on insertion and deletion
+    - RedBlackTree: approximately balanced (at most 2logN high) with fewer rotations
+    - bisect (sorted list): O(logN) search and very fast scans BUT O(N) insertion and deletion (memory moves)
+    - dict: O(1) insert, search and delete BUT no order at all (a range scan has to check every key)
+
+Workloads (size distinct integer keys)
+    - sorted, reverse: the keys are inserted in ascending or descending order
+    - random: the keys are inserted in random order
+    - zipf: random insertion order, the searches follow a Zipf distribution (a few keys are very popular)
+    - the searches are uniform for the other workloads, the keys are deleted in random order
+
+For every structure and workload we report as JSON
+    - operations per second for insert, search, range scan (about 100 keys per scan) and delete
+    - peak memory of building the structure (tracemalloc, measured in a separate run as it slows everything down)
+    - height of the tree and the number of rotations (insertion and deletion)
+"""
+
+import argparse
+import bisect
+import json
+import random
+import time
+import tracemalloc
+
+from avl_trees import AVLTree
+from binary_search_trees import BinarySearchTree
+from red_black_trees import RedBlackTree
+
+DISTRIBUTIONS = ('sorted', 'reverse', 'random', 'zipf')
+# the scans cover about 100 keys (the keys are sampled from a range of 4 * size integers)
+KEY_SPREAD = 4
+SCAN_WIDTH = 100 * KEY_SPREAD
+
+
+def tree_height(root):
+    """
+    Number of levels of a BST, AVL or red-black tree (level by level so there is no recursion)
+    """
+    height = 0
+    level = [root] if root is not None else []
+
+    while level:
+        height = height + 1
+        level = [child for node in level for child in (node.leftChild, node.rightChild) if child is not None]
+
+    return height
+
+
+class TreeWorkload:
+    """
+    The same interface for the trees and the baselines: insert, search, delete, scan, height and rotations
+    """
+
+    def __init__(self, tree, remove_name):
+        self.tree = tree
+        self.insert = tree.insert
+        self.search = tree.search
+        self.delete = getattr(tree, remove_name)
+
+    def scan(self, low, high):
+        return sum(1 for _ in self.tree.items(low, high))
+
+    def height(self):
+        return tree_height(self.tree.root)
+
+    def rotations(self):
+        return getattr(self.tree, 'rotations', 0)
+
+
+class BisectWorkload:
+
+    def __init__(self):
+        self.keys = []
+
+    def insert(self, key):
+        bisect.insort(self.keys, key)
+
+    def search(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+    def delete(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+    def scan(self, low, high):
+        return len(self.keys[bisect.bisect_left(self.keys, low):bisect.bisect_right(self.keys, high)])
+
+    def height(self):
+        return None
+
+    def rotations(self):
+        return None
+
+
+class DictWorkload:
+
+    def __init__(self):
+        self.table = {}
+
+    def insert(self, key):
+        self.table[key] = None
+
+    def search(self, key):
+        return key in self.table
+
+    def delete(self, key):
+        del self.table[key]
+
+    def scan(self, low, high):
+        # no order: every key has to be checked
+        return sum(1 for key in self.table if low <= key <= high)
+
+    def height(self):
+        return None
+
+    def rotations(self):
+        return None
+
+
+STRUCTURES = {
+    'BinarySearchTree': lambda: TreeWorkload(BinarySearchTree(), 'remove_value'),
+    'AVLTree': lambda: TreeWorkload(AVLTree(verbose=False), 'remove'),
+    'RedBlackTree': lambda: TreeWorkload(RedBlackTree(verbose=False), 'delete'),
+    'bisect': BisectWorkload,
+    'dict': DictWorkload,
+}
+
+
+def zipf_sample(generator, population, count, exponent=1.1):
+    # the i-th item of the population is chosen with probability proportional to 1 / i^exponent
+    cumulative_weights = []
+    total = 0
+    for rank in range(1, len(population) + 1):
+        total = total + 1 / rank ** exponent
+        cumulative_weights.append(total)
+    return generator.choices(population, cum_weights=cumulative_weights, k=count)
+
+
+def make_workload(distribution, size, generator):
+    """
+    Returns the insertion order, the search keys, the (low, high) scans and the deletion order
+    """
+    keys = generator.sample(range(size * KEY_SPREAD), size)
+
+    if distribution == 'sorted':
+        insertions = sorted(keys)
+    elif distribution == 'reverse':
+        insertions = sorted(keys, reverse=True)
+    elif distribution in ('random', 'zipf'):
+        insertions = keys
+    else:
+        raise ValueError(f'Unknown distribution: {distribution}')
+
+    if distribution == 'zipf':
+        # the popularity ranking is a random permutation of the keys (not related to the order of the keys)
+        searches = zipf_sample(generator, generator.sample(keys, size), size)
+    else:
+        searches = [generator.choice(keys) for _ in range(size)]
+
+    scans = []
+    for _ in range(max(1, size // 100)):
+        low = generator.randrange(size * KEY_SPREAD)
+        scans.append((low, low + SCAN_WIDTH))
+
+    deletions = generator.sample(keys, size)
+
+    return insertions, searches, scans, deletions
+
+
+def operations_per_second(count, seconds):
+    return round(count / seconds, 1) if seconds > 0 else None
+
+
+def measure(structure, distribution, size, seed):
+    generator = random.Random(seed)
+    insertions, searches, scans, deletions = make_workload(distribution, size, generator)
+    workload = STRUCTURES[structure]()
+    result = {'structure': structure, 'distribution': distribution, 'size': size}
+
+    start = time.perf_counter()
+    for key in insertions:
+        workload.insert(key)
+    result['insert_ops_per_sec'] = operations_per_second(size, time.perf_counter() - start)
+
+    result['height'] = workload.height()
+    rotations = workload.rotations()
+    result['insert_rotations'] = rotations
+
+    search = workload.search
+    start = time.perf_counter()
+    for key in searches:
+        search(key)
+    result['search_ops_per_sec'] = operations_per_second(size, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for low, high in scans:
+        workload.scan(low, high)
+    result['scan_ops_per_sec'] = operations_per_second(len(scans), time.perf_counter() - start)
+
+    delete = workload.delete
+    start = time.perf_counter()
+    for key in deletions:
+        delete(key)
+    result['delete_ops_per_sec'] = operations_per_second(size, time.perf_counter() - start)
+
+    if rotations is not None:
+        result['delete_rotations'] = workload.rotations() - rotations
+    else:
+        result['delete_rotations'] = None
+
+    # second run for the memory: tracemalloc makes every allocation a lot slower
+    workload = STRUCTURES[structure]()
+    tracemalloc.start()
+    for key in insertions:
+        workload.insert(key)
+    result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result
+
+
+def run_benchmarks(size=10**4, distributions=DISTRIBUTIONS, structures=tuple(STRUCTURES), seed=42):
+    """
+    Returns a list with the measurements of every structure on every distribution (the same keys for every
+    structure of a distribution)
+    """
+    results = []
+
+    for distribution in distributions:
+        for structure in structures:
+            results.append(measure(structure, distribution, size, seed))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the ordered trees against bisect and dict')
+    parser.add_argument('--size', type=int, default=10**4, help='number of keys')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--distribution', action='append', choices=DISTRIBUTIONS,
+                        help='workload (every workload by default)')
+    parser.add_argument('--structure', action='append', choices=tuple(STRUCTURES),
+                        help='structure (every structure by default)')
+    parser.add_argument('--output', help='write the JSON into this file instead of printing it')
+    arguments = parser.parse_args()
+
+    report = {
+        'size': arguments.size,
+        'seed': arguments.seed,
+        'results': run_benchmarks(arguments.size, arguments.distribution or DISTRIBUTIONS,
+                                  arguments.structure or tuple(STRUCTURES), arguments.seed),
+    }
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,349 @@
+# On-disk snapshots of sorted trees
+
+"""
+Rebuilding a tree means inserting every key again: O(NlogN) with a lot of rotations (and python objects).
+Instead we write the sorted keys into a file once and query the file directly (memory mapping): the operating
+system loads the pages we touch, so opening a snapshot takes the same time for a thousand or a billion keys.
+
+File format
+    - header (16 bytes): magic b'SRTK', version, key typecode ('q' 64 bit integers, 'd' floats),
+        byte order ('<' or '>'), padding and the number of keys (unsigned 64 bit)
+    - the keys as a flat array in Eytzinger order
+
+Eytzinger layout
+    - the sorted keys are stored in the order of a breadth first traversal of a perfectly balanced tree
+        (like a binary heap: the children of index k are 2k and 2k+1, 1-based)
+    - a binary search visits k = 1, 2 or 3, 4-7 ... so the first levels of the search share a few pages
+        and the next index is computed (2k or 2k+1) instead of being read from a node
+    - no pointers are stored: the file is just the keys (8 bytes per key)
+
+|           | Snapshot      |
+|-----------|---------------|
+| Open      | O(1)          |
+| Search    | O(logN)       |
+| Floor     | O(logN)       |
+| Range     | O(logN + K)   | K is the number of items in the range
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b'SRTK'
+VERSION = 1
+# magic, version, typecode, byte order, 1 byte padding, number of keys
+HEADER = struct.Struct('<4sBccxQ')
+# typecodes that memoryview.cast() accepts
+KEY_TYPES = 'bBhHiIlLqQfd'
+
+
+def eytzinger_order(keys):
+    """
+    Rearranges the sorted keys (array): position k-1 of the result holds the node k of the implicit tree
+    the in-order traversal of the implicit tree visits the keys in sorted order
+    """
+    count = len(keys)
+    result = array(keys.typecode, bytes(count * keys.itemsize))
+    stack = []
+    index = 0
+    node = 1
+
+    while stack or node <= count:
+        while node <= count:
+            stack.append(node)
+            node = 2 * node
+
+        node = stack.pop()
+        result[node - 1] = keys[index]
+        index = index + 1
+        node = 2 * node + 1
+
+    return result
+
+
+def save_sorted(path, items, key_type='q'):
+    """
+    Writes the sorted items (any iterable, for example tree.items()) into a snapshot file
+    Equal items are kept (the trees accept duplicates): lower_bound() finds the first of a run of equal items
+    and items() yields all of them
+    """
+    keys = array(key_type, items)
+    for index in range(1, len(keys)):
+        if keys[index] < keys[index - 1]:
+            raise ValueError('The items have to be sorted')
+
+    byte_order = b'<' if sys.byteorder == 'little' else b'>'
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, key_type.encode(), byte_order, len(keys)))
+        file.write(eytzinger_order(keys).tobytes())
+
+
+def open_mmap(path):
+    return MappedSortedKeys(path)
+
+
+class MappedSortedKeys:
+    """
+    Read only sorted multiset (the duplicates of the tree are kept) answering the queries straight from the memory mapped snapshot file
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise ValueError(f'{path} is not a tree snapshot')
+
+        magic, version, key_type, byte_order, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f'{path} is not a tree snapshot')
+        if byte_order != (b'<' if sys.byteorder == 'little' else b'>'):
+            self.map.close()
+            raise ValueError(f'{path} was written on a machine with a different byte order')
+
+        # the file has to hold exactly count keys (cast() fails on a partial key)
+        key_type = key_type.decode()
+        if key_type not in KEY_TYPES or len(self.map) - HEADER.size != count * array(key_type).itemsize:
+            self.map.close()
+            raise ValueError(f'{path} is truncated or corrupted')
+
+        self.count = count
+        # no copy: indexing the memoryview reads the key from the mapped page
+        self.keys = memoryview(self.map)[HEADER.size:].cast(key_type)
+
+    def close(self):
+        # the memoryview has to be released before the map can be closed
+        self.keys.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def lower_bound(self, data):
+        """
+        Node (1-based index) of the smallest key >= data or 0 if there is no such key: O(logN)
+        """
+        keys = self.keys
+        count = self.count
+        node = 1
+
+        # we always go down to a leaf: right if the key is smaller than data, left otherwise
+        while node <= count:
+            node = 2 * node + (keys[node - 1] < data)
+
+        # the answer is the last node where we went left: drop the trailing right turns (1 bits) and that left turn
+        return node >> ((~node & (node + 1)).bit_length())
+
+    def upper_bound(self, data):
+        """
+        Node (1-based index) of the smallest key > data or 0 if there is no such key: O(logN)
+        """
+        keys = self.keys
+        count = self.count
+        node = 1
+
+        while node <= count:
+            node = 2 * node + (keys[node - 1] <= data)
+
+        return node >> ((~node & (node + 1)).bit_length())
+
+    def successor_node(self, node):
+        # left most node of the right subtree or the first ancestor where we went left
+        if 2 * node + 1 <= self.count:
+            node = 2 * node + 1
+            while 2 * node <= self.count:
+                node = 2 * node
+            return node
+
+        while node & 1:
+            node = node >> 1
+        return node >> 1
+
+    def predecessor_node(self, node):
+        if 2 * node <= self.count:
+            node = 2 * node
+            while 2 * node + 1 <= self.count:
+                node = 2 * node + 1
+            return node
+
+        while node and not node & 1:
+            node = node >> 1
+        return node >> 1
+
+    def last_node(self):
+        node = 0
+        while 2 * node + 1 <= self.count:
+            node = 2 * node + 1
+        return node
+
+    def search(self, data):
+        """
+        Returns the item if it is in the snapshot (None otherwise): O(logN)
+        """
+        node = self.lower_bound(data)
+        if node and self.keys[node - 1] == data:
+            return self.keys[node - 1]
+        return None
+
+    def __contains__(self, data):
+        node = self.lower_bound(data)
+        return node != 0 and self.keys[node - 1] == data
+
+    def floor(self, data):
+        """
+        Largest item smaller than or equal to data (None if there is no such item): O(logN)
+        """
+        node = self.upper_bound(data)
+        node = self.predecessor_node(node) if node else self.last_node()
+        return self.keys[node - 1] if node else None
+
+    def ceiling(self, data):
+        """
+        Smallest item greater than or equal to data (None if there is no such item): O(logN)
+        """
+        node = self.lower_bound(data)
+        return self.keys[node - 1] if node else None
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Yields the items with lo <= item <= hi in sorted order (None means no limit)
+        O(logN) to find the first item and amortized O(1) for every next item
+        """
+        keys = self.keys
+
+        if not reverse:
+            node = self.lower_bound(lo) if lo is not None else self.successor_node(0) if self.count else 0
+            while node:
+                data = keys[node - 1]
+                if hi is not None and hi < data:
+                    return
+                yield data
+                node = self.successor_node(node)
+        else:
+            if hi is None:
+                node = self.last_node()
+            else:
+                node = self.upper_bound(hi)
+                node = self.predecessor_node(node) if node else self.last_node()
+            while node:
+                data = keys[node - 1]
+                if lo is not None and data < lo:
+                    return
+                yield data
+                node = self.predecessor_node(node)
+
+    def __iter__(self):
+        return self.items()
+
+
+def randomized_snapshot_check(trials=200, seed=None):
+    """
+    Saves AVL and red-black trees with duplicate keys and compares the queries of the snapshot
+    with a sorted list
+    """
+    import bisect
+    import os
+    import random
+    import tempfile
+
+    from avl_trees import AVLTree
+    from red_black_trees import RedBlackTree
+
+    generator = random.Random(seed)
+    path = os.path.join(tempfile.mkdtemp(), 'snapshot.bin')
+
+    for _ in range(trials):
+        for tree_class in (AVLTree, RedBlackTree):
+            tree = tree_class(verbose=False)
+            expected = sorted(generator.randrange(50) for _ in range(generator.randrange(80)))
+            for key in generator.sample(expected, len(expected)):
+                tree.insert(key)
+            tree.save(path)
+
+            with open_mmap(path) as snapshot:
+                assert len(snapshot) == len(expected) and list(snapshot) == expected
+                for key in range(-2, 53):
+                    low = bisect.bisect_left(expected, key)
+                    high = bisect.bisect_right(expected, key)
+                    assert (key in snapshot) == (low < high)
+                    assert snapshot.floor(key) == (expected[high - 1] if high > 0 else None)
+                    assert snapshot.ceiling(key) == (expected[low] if low < len(expected) else None)
+                    in_range = expected[low:bisect.bisect_right(expected, key + 5)]
+                    assert list(snapshot.items(key, key + 5)) == in_range
+                    assert list(snapshot.items(hi=key, reverse=True)) == expected[:high][::-1]
+
+    # truncated files (on a key boundary or in the middle of a key) are rejected
+    save_sorted(path, range(10))
+    with open(path, 'rb') as file:
+        data = file.read()
+    for size in (HEADER.size - 1, HEADER.size, len(data) - 8, len(data) - 3):
+        with open(path, 'wb') as file:
+            file.write(data[:size])
+        try:
+            open_mmap(path).close()
+        except ValueError:
+            continue
+        raise AssertionError(f'a snapshot truncated to {size} bytes was opened')
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    print(f'{trials * 2} snapshots checked')
+
+
+def benchmark_startup(count=10**6, path='tree_snapshot.bin'):
+    """
+    Rebuilding an AVL tree from the sorted keys versus opening the snapshot of the same keys
+    """
+    import os
+    import random
+    import time
+
+    from avl_trees import AVLTree
+
+    keys = sorted(random.sample(range(count * 10), count))
+
+    start = time.perf_counter()
+    tree = AVLTree.from_sorted(keys)
+    build_time = time.perf_counter() - start
+
+    tree.save(path)
+
+    start = time.perf_counter()
+    snapshot = open_mmap(path)
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in random.sample(keys, 10**4):
+        snapshot.search(key)
+    search_time = time.perf_counter() - start
+
+    print(f'{count} keys: rebuild {build_time:.3f} s open {open_time * 10**3:.3f} ms '
+          f'search {search_time / 10**4 * 10**9:.0f} ns file size: {os.path.getsize(path)} bytes')
+
+    snapshot.close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    save_sorted('example_snapshot.bin', [1, 3, 5, 7, 9, 11, 13])
+
+    with open_mmap('example_snapshot.bin') as example_snapshot:
+        print(f'Search 7: {example_snapshot.search(7)} floor 8: {example_snapshot.floor(8)} '
+              f'ceiling 8: {example_snapshot.ceiling(8)}')
+        print(f'Items 4 - 11: {list(example_snapshot.items(4, 11))}')
+
+    import os
+    os.remove('example_snapshot.bin')
+
+    randomized_snapshot_check(50)
+
+    # benchmark_startup()